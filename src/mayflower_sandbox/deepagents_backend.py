@@ -17,7 +17,8 @@ import logging
 import re
 import shlex
 import threading
-from datetime import datetime
+import weakref
+from datetime import datetime, timezone
 from typing import Any
 
 logger = logging.getLogger(__name__)
@@ -125,6 +126,51 @@ def _format_timestamp(value: Any) -> str:
     return str(value)
 
 
+# Persistent event loop per thread for sync callers with no running loop
+_thread_loops = threading.local()
+
+
+def _cancel_pending_tasks(loop: asyncio.AbstractEventLoop) -> None:
+    """Cancel tasks left behind on loop and wait for them to finish."""
+    pending = asyncio.all_tasks(loop)
+    if not pending:
+        return
+    for task in pending:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+
+
+def _close_thread_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """Shut down a loop created by _run_in_thread_loop."""
+    if loop.is_closed() or loop.is_running():
+        return
+    try:
+        _cancel_pending_tasks(loop)
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    finally:
+        loop.close()
+
+
+def _run_in_thread_loop(coro: Any) -> Any:
+    """Run a coroutine on this thread's reusable event loop.
+
+    Unlike asyncio.run(), the loop (and its selector) is created once per
+    thread and reused by every later sync call. Tasks the coroutine leaves
+    running are cancelled before returning. The loop is closed when its
+    thread is collected, or at interpreter exit for threads still alive.
+    """
+    loop = getattr(_thread_loops, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _thread_loops.loop = loop
+        # weakref.finalize callbacks also run at exit (an atexit hook)
+        weakref.finalize(threading.current_thread(), _close_thread_loop, loop)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        _cancel_pending_tasks(loop)
+
+
 def _create_file_data(content: str, created_at: str | None = None) -> dict[str, Any]:
     """Create a FileData dict matching DeepAgents StateBackend format.
 
@@ -139,8 +185,6 @@ def _create_file_data(content: str, created_at: str | None = None) -> dict[str,
         FileData dict with content lines and timestamps.
     """
     lines = content.split("\n") if isinstance(content, str) else content
-    from datetime import timezone
-
     now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
     return {
         "content": lines,
@@ -202,7 +246,7 @@ class PostgresBackend(BackendProtocol):
             running_loop = None
 
         if running_loop is None:
-            return asyncio.run(coro)
+            return _run_in_thread_loop(coro)
 
         if self._loop is None:
             self._loop = running_loop
@@ -231,7 +275,7 @@ class PostgresBackend(BackendProtocol):
         try:
             normalized = self._vfs.validate_path(path)
         except InvalidPathError:
-            logger.debug(f"als_info: invalid path '{path}'")
+            logger.debug("als_info: invalid path '%s'", path)
             return []
 
         prefix = normalized
@@ -598,7 +642,7 @@ class MayflowerSandboxBackend(PostgresBackend, SandboxBackendProtocol):
             running_loop = None
 
         if running_loop is None:
-            return asyncio.run(coro)
+            return _run_in_thread_loop(coro)
 
         if self._loop is None:
             self._loop = running_loop
@@ -28,19 +28,25 @@ interface ExecutionResult {
   stdout: string;
   stderr: string;
   result: unknown;
-  sessionBytes?: number[];
+  sessionBytes?: string; // base64
   sessionMetadata?: Record<string, unknown>;
-  files?: Array<{ path: string; content: number[] }>;
+  files?: Array<{ path: string; content: string }>; // base64 content
 }
 
 // Utility functions (filterMicropipMessages, createStdoutHandler, etc.)
 // are imported from worker_utils.ts
 
+interface StdinPayload {
+  files: Record<string, Uint8Array>;
+  sessionBytes?: Uint8Array;
+  sessionMetadata?: Record<string, unknown>;
+}
+
 /**
- * Read binary file data from stdin
+ * Read binary file data (and optional session state) from stdin
  */
-async function readStdinFiles(): Promise<Record<string, Uint8Array>> {
-  const files: Record<string, Uint8Array> = {};
+async function readStdinPayload(): Promise<StdinPayload> {
+  const payload: StdinPayload = { files: {} };
 
   // Read all stdin data (modern Deno API)
   const chunks: Uint8Array[] = [];
@@ -60,13 +66,14 @@ async function readStdinFiles(): Promise<Record<string, Uint8Array>> {
   }
 
   if (stdinData.length === 0) {
-    return files;
+    return payload;
   }
 
   // Parse binary protocol: "MFS\x01" + length(4) + JSON metadata + file contents
+  // [+ session bytes, described by metadata.session]
   const magic = new TextDecoder().decode(stdinData.slice(0, 4));
   if (!magic.startsWith("MFS")) {
-    return files;
+    return payload;
   }
 
   const metadataLength = new DataView(stdinData.buffer).getUint32(4, false);
@@ -77,11 +84,18 @@ async function readStdinFiles(): Promise<Record<string, Uint8Array>> {
 
   for (const file of metadata.files || []) {
     const content = stdinData.slice(fileOffset, fileOffset + file.size);
-    files[file.path] = content;
+    payload.files[file.path] = content;
     fileOffset += file.size;
   }
 
-  return files;
+  if (metadata.session) {
+    if (metadata.session.size) {
+      payload.sessionBytes = stdinData.slice(fileOffset, fileOffset + metadata.session.size);
+    }
+    payload.sessionMetadata = metadata.session.metadata;
+  }
+
+  return payload;
 }
 
 // File operations (snapshotFiles, collectFiles, collectFilesFromPaths)
@@ -118,9 +132,9 @@ globals().update(_session_obj)
 }
 
 /**
- * Save session state to bytes
+ * Save session state to base64-encoded bytes
  */
-async function saveSession(pyodide: any): Promise<number[]> {
+async function saveSession(pyodide: any): Promise<string> {
   const sessionBytesResult = await pyodide.runPythonAsync(`
 import types
 _globals_snapshot = dict(globals())
@@ -133,9 +147,10 @@ for k, v in _globals_snapshot.items():
     if hasattr(v, 'read') or hasattr(v, 'write'):
         continue
     _session_dict[k] = v
-list(cloudpickle.dumps(_session_dict))
+import base64 as _base64
+_base64.b64encode(cloudpickle.dumps(_session_dict)).decode("ascii")
 `);
-  return sessionBytesResult.toJs();
+  return sessionBytesResult;
 }
 
 /**
@@ -274,35 +289,21 @@ except ImportError:
  */
 async function main() {
   const args = parseArgs(Deno.args, {
-    string: ["code", "session-bytes", "session-metadata"],
+    string: ["code"],
     boolean: ["stateful"],
     alias: {
       c: "code",
       s: "stateful",
-      b: "session-bytes",
-      m: "session-metadata",
     },
   });
 
   if (!args.code) {
-    console.error("Usage: executor.ts -c <code> [-s] [-b <session-bytes>]");
+    console.error("Usage: executor.ts -c <code> [-s]");
     Deno.exit(1);
   }
 
-  // Read files from stdin
-  const files = await readStdinFiles();
-
-  // Parse session data
-  let sessionBytes: Uint8Array | undefined;
-  let sessionMetadata: Record<string, unknown> | undefined;
-
-  if (args["session-bytes"]) {
-    sessionBytes = new Uint8Array(JSON.parse(args["session-bytes"]));
-  }
-
-  if (args["session-metadata"]) {
-    sessionMetadata = JSON.parse(args["session-metadata"]);
-  }
+  // Read files and session state from stdin
+  const { files, sessionBytes, sessionMetadata } = await readStdinPayload();
 
   // Execute
   const result = await execute({
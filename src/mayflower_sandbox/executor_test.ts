@@ -7,7 +7,7 @@
 import { assertEquals, assertExists } from "jsr:@std/assert@1";
 
 // Test the binary protocol parsing logic (MFS format)
-// The actual readStdinFiles reads from Deno.stdin, so we test the protocol format
+// The actual readStdinPayload reads from Deno.stdin, so we test the protocol format
 
 Deno.test("MFS binary protocol - can create valid protocol data", () => {
   // Create a valid MFS binary protocol payload
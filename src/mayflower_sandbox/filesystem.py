@@ -8,6 +8,7 @@ This VFS serves as the persistent layer. Files stored here will be:
 import logging
 import mimetypes
 import re
+from collections.abc import AsyncIterator
 from pathlib import Path
 
 import asyncpg
@@ -23,6 +24,10 @@ class FileTooLargeError(Exception):
     """File exceeds size limit."""
 
 
+class FileChangedError(Exception):
+    """File was overwritten or deleted while it was being read."""
+
+
 class InvalidPathError(Exception):
     """Path is invalid or outside allowed sandbox."""
 
@@ -188,10 +193,77 @@ class VirtualFilesystem:
                 size,
             )
 
-            logger.debug(f"Wrote file {normalized_path} ({size} bytes) for thread {self.thread_id}")
+            logger.debug(
+                "Wrote file %s (%d bytes) for thread %s", normalized_path, size, self.thread_id
+            )
 
             return dict(result) if result else {}
 
+    async def write_files_bulk(self, files: list[tuple[str, bytes]]) -> int:
+        """Write many files in a single upsert statement.
+
+        Validation matches ``write_file``; the whole batch is rejected before
+        any row is written if one entry is invalid. Entries that normalize to
+        the same path behave like consecutive ``write_file`` calls: the last
+        one wins.
+
+        Args:
+            files: List of (file_path, content) tuples
+
+        Returns:
+            Number of distinct files written
+
+        Raises:
+            InvalidPathError: If any path is invalid
+            FileTooLargeError: If any content exceeds 20MB
+        """
+        if not files:
+            return 0
+
+        # A single upsert can't touch the same row twice, so keep one entry per path
+        by_path: dict[str, bytes] = {}
+        for file_path, content in files:
+            normalized_path = self.validate_path(file_path)
+            size = len(content)
+            if size > self.MAX_FILE_SIZE:
+                raise FileTooLargeError(
+                    f"File size {size} bytes exceeds limit of {self.MAX_FILE_SIZE} bytes"
+                )
+            by_path[normalized_path] = content
+
+        paths = list(by_path)
+        contents = list(by_path.values())
+        content_types = [self.detect_content_type(p, c) for p, c in by_path.items()]
+        sizes = [len(c) for c in contents]
+
+        await self.ensure_session()
+
+        async with self.db.acquire() as conn:
+            await conn.execute(
+                """
+                INSERT INTO sandbox_filesystem (
+                    thread_id, file_path, content, content_type, size
+                )
+                SELECT $1, f.file_path, f.content, f.content_type, f.size
+                FROM unnest($2::text[], $3::bytea[], $4::text[], $5::int[])
+                    AS f(file_path, content, content_type, size)
+                ON CONFLICT (thread_id, file_path)
+                DO UPDATE SET
+                    content = EXCLUDED.content,
+                    content_type = EXCLUDED.content_type,
+                    size = EXCLUDED.size,
+                    modified_at = NOW()
+            """,
+                self.thread_id,
+                paths,
+                contents,
+                content_types,
+                sizes,
+            )
+
+        logger.debug("Wrote %d files in bulk for thread %s", len(paths), self.thread_id)
+        return len(paths)
+
     async def read_file(self, file_path: str) -> dict:
         """Read file from filesystem.
 
@@ -224,6 +296,125 @@ class VirtualFilesystem:
 
             return dict(result)
 
+    async def get_file_info(self, file_path: str) -> dict:
+        """Read file metadata without its content.
+
+        Args:
+            file_path: Path to look up
+
+        Returns:
+            Dict with file_path, content_type, size, created_at, modified_at, metadata.
+            modified_at is timezone-aware (the naive column is read in the
+            database session's time zone).
+
+        Raises:
+            InvalidPathError: If path is invalid
+            FileNotFoundError: If file doesn't exist
+        """
+        normalized_path = self.validate_path(file_path)
+
+        async with self.db.acquire() as conn:
+            result = await conn.fetchrow(
+                """
+                SELECT file_path, content_type, size, created_at,
+                       modified_at::timestamptz AS modified_at, metadata
+                FROM sandbox_filesystem
+                WHERE thread_id = $1 AND file_path = $2
+            """,
+                self.thread_id,
+                normalized_path,
+            )
+
+            if not result:
+                raise FileNotFoundError(
+                    f"File {normalized_path} not found in thread {self.thread_id}"
+                )
+
+            return dict(result)
+
+    async def open_file_stream(
+        self, file_path: str, chunk_size: int = 256 * 1024
+    ) -> tuple[dict, AsyncIterator[bytes]]:
+        """Read file metadata and return an iterator over its content chunks.
+
+        The metadata and the first chunk come from the same row version.
+        Files up to ``chunk_size`` bytes are loaded with that first query, and
+        so are compressed values, since Postgres would decompress a slice from
+        the start every time. With the column's default EXTENDED storage that
+        covers most compressible files (text, CSV, JSON), which are therefore
+        held in memory whole. Only larger uncompressed or incompressible
+        files fetch each further chunk on its own short connection checkout.
+        Either way a slow client never pins a pooled connection.
+
+        Args:
+            file_path: Path to read
+            chunk_size: Maximum bytes per chunk
+
+        Returns:
+            Tuple of (metadata dict as from ``get_file_info``, chunk iterator).
+            The iterator raises FileChangedError if the file is overwritten
+            or deleted before all chunks were read.
+
+        Raises:
+            InvalidPathError: If path is invalid
+            FileNotFoundError: If file doesn't exist
+        """
+        normalized_path = self.validate_path(file_path)
+
+        async with self.db.acquire() as conn:
+            result = await conn.fetchrow(
+                """
+                SELECT file_path, content_type, size, created_at,
+                       modified_at::timestamptz AS modified_at, metadata,
+                       CASE WHEN size <= $3 OR pg_column_compression(content) IS NOT NULL
+                            THEN content
+                            ELSE substring(content FROM 1 FOR $3)
+                       END AS head
+                FROM sandbox_filesystem
+                WHERE thread_id = $1 AND file_path = $2
+            """,
+                self.thread_id,
+                normalized_path,
+                chunk_size,
+            )
+
+        if not result:
+            raise FileNotFoundError(f"File {normalized_path} not found in thread {self.thread_id}")
+
+        file_info = dict(result)
+        head = file_info.pop("head")
+        return file_info, self._iter_file_chunks(normalized_path, file_info, head, chunk_size)
+
+    async def _iter_file_chunks(
+        self, normalized_path: str, file_info: dict, head: bytes, chunk_size: int
+    ) -> AsyncIterator[bytes]:
+        """Yield ``head`` in chunks, then fetch the rest of the file chunk by chunk."""
+        for start in range(0, len(head), chunk_size):
+            yield head[start : start + chunk_size]
+
+        offset = len(head) + 1  # SQL substring positions are 1-based
+        while offset <= file_info["size"]:
+            async with self.db.acquire() as conn:
+                chunk = await conn.fetchval(
+                    """
+                    SELECT substring(content FROM $3 FOR $4)
+                    FROM sandbox_filesystem
+                    WHERE thread_id = $1 AND file_path = $2
+                      AND modified_at::timestamptz = $5
+                """,
+                    self.thread_id,
+                    normalized_path,
+                    offset,
+                    chunk_size,
+                    file_info["modified_at"],
+                )
+            if not chunk:
+                raise FileChangedError(
+                    f"File {normalized_path} changed while being read in thread {self.thread_id}"
+                )
+            yield chunk
+            offset += len(chunk)
+
     async def delete_file(self, file_path: str) -> bool:
         """Delete file from filesystem.
 
@@ -284,6 +475,52 @@ class VirtualFilesystem:
 
             return [dict(f) for f in files]
 
+    async def list_files_metadata(self, pattern: str | None = None) -> list[dict]:
+        """List file metadata without reading any file contents.
+
+        Args:
+            pattern: Optional SQL LIKE pattern for filtering
+
+        Returns:
+            List of dicts with file_path, content_type, size, created_at, modified_at
+        """
+        async with self.db.acquire() as conn:
+            files = await conn.fetch(
+                """
+                SELECT file_path, content_type, size, created_at, modified_at
+                FROM sandbox_filesystem
+                WHERE thread_id = $1 AND ($2::text IS NULL OR file_path LIKE $2)
+                ORDER BY file_path
+            """,
+                self.thread_id,
+                pattern,
+            )
+
+            return [dict(f) for f in files]
+
+    async def snapshot_for_execute(self) -> tuple[int, int, set[str]]:
+        """Get file count, total size and paths in one query, without file contents.
+
+        Returns:
+            (num_files, total_size_bytes, file_paths)
+        """
+        async with self.db.acquire() as conn:
+            row = await conn.fetchrow(
+                """
+                SELECT count(*) AS num_files,
+                       COALESCE(sum(size), 0) AS total_size,
+                       COALESCE(array_agg(file_path), '{}') AS file_paths
+                FROM sandbox_filesystem
+                WHERE thread_id = $1
+            """,
+                self.thread_id,
+            )
+
+            if not row:
+                return 0, 0, set()
+
+            return row["num_files"], row["total_size"], set(row["file_paths"])
+
     async def file_exists(self, file_path: str) -> bool:
         """Check if file exists.
 
@@ -74,13 +74,33 @@ export function joinPath(parent: string, entry: string): string {
 }
 
 /**
- * Read file content from Pyodide FS.
+ * Encode bytes as base64.
+ * Keeps binary payloads compact in JSON output (vs. a 4x larger int array).
+ */
+export function encodeBase64(bytes: Uint8Array): string {
+  const chunkSize = 0x8000; // stay below the argument limit of String.fromCharCode
+  let binary = "";
+  for (let i = 0; i < bytes.length; i += chunkSize) {
+    binary += String.fromCharCode(...bytes.subarray(i, i + chunkSize));
+  }
+  return btoa(binary);
+}
+
+/**
+ * Decode base64 into bytes (inverse of encodeBase64).
+ */
+export function decodeBase64(base64: string): Uint8Array {
+  return Uint8Array.from(atob(base64), (c) => c.charCodeAt(0));
+}
+
+/**
+ * Read file content from Pyodide FS as base64.
  * Returns null on any FS error (file not found, permission denied, etc).
  */
-export function readFileContent(pyodide: any, path: string): number[] | null {
+export function readFileContent(pyodide: any, path: string): string | null {
   try {
     const content = pyodide.FS.readFile(path);
-    return Array.from(content);
+    return encodeBase64(content);
   } catch {
     return null; // File not readable - return null
   }
@@ -143,7 +163,7 @@ export function snapshotFiles(pyodide: any, paths: string[]): Map<string, number
 function collectPath(
   pyodide: any,
   path: string,
-  files: Array<{ path: string; content: number[] }>,
+  files: Array<{ path: string; content: string }>,
 ): void {
   if (!pathExists(pyodide, path)) return;
 
@@ -162,13 +182,13 @@ function collectPath(
 
 /**
  * Collect files from Pyodide filesystem (recursive).
- * Returns file paths with their content.
+ * Returns file paths with their base64-encoded content.
  */
 export function collectFiles(
   pyodide: any,
   paths: string[],
-): Array<{ path: string; content: number[] }> {
-  const files: Array<{ path: string; content: number[] }> = [];
+): Array<{ path: string; content: string }> {
+  const files: Array<{ path: string; content: string }> = [];
   for (const path of paths) {
     collectPath(pyodide, path, files);
   }
@@ -182,8 +202,8 @@ export function collectFiles(
 export function collectFilesFromPaths(
   pyodide: any,
   paths: string[],
-): Array<{ path: string; content: number[] }> {
-  const files: Array<{ path: string; content: number[] }> = [];
+): Array<{ path: string; content: string }> {
+  const files: Array<{ path: string; content: string }> = [];
 
   for (const path of paths) {
     if (isSystemPath(path)) continue;
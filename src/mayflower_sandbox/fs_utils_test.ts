@@ -12,6 +12,8 @@ import {
   readDirEntries,
   joinPath,
   readFileContent,
+  encodeBase64,
+  decodeBase64,
   isSystemPath,
   snapshotFiles,
   collectFiles,
@@ -153,11 +155,17 @@ Deno.test("joinPath handles nested path", () => {
 });
 
 // readFileContent tests
-Deno.test("readFileContent returns file content as number array", () => {
+Deno.test("readFileContent returns file content as base64", () => {
   const pyodide = createMockPyodide({
     "/tmp/file.txt": { isDir: false, content: [72, 101, 108, 108, 111] },
   });
-  assertEquals(readFileContent(pyodide, "/tmp/file.txt"), [72, 101, 108, 108, 111]);
+  assertEquals(readFileContent(pyodide, "/tmp/file.txt"), "SGVsbG8=");
+});
+
+// encodeBase64 tests
+Deno.test("encodeBase64 round-trips binary data larger than one chunk", () => {
+  const bytes = new Uint8Array(0x8000 * 2 + 3).map((_, i) => i % 256);
+  assertEquals(decodeBase64(encodeBase64(bytes)), bytes);
 });
 
 Deno.test("readFileContent returns null for non-existing file", () => {
@@ -259,8 +267,8 @@ Deno.test("collectFiles collects file content recursively", () => {
 
   const fileA = files.find(f => f.path === "/tmp/a.txt");
   const fileB = files.find(f => f.path === "/tmp/sub/b.txt");
-  assertEquals(fileA?.content, [65]);
-  assertEquals(fileB?.content, [66]);
+  assertEquals(fileA?.content, "QQ==");
+  assertEquals(fileB?.content, "Qg==");
 });
 
 // collectFilesFromPaths tests
@@ -8,6 +8,17 @@ import asyncpg
 
 logger = logging.getLogger(__name__)
 
+# Create the session or refresh last_accessed on an existing one in a single
+# statement; xmax = 0 only for a freshly inserted row. Shared with
+# SessionRecovery.open_session, which joins the session bytes onto it.
+_GET_OR_CREATE_SQL = """
+    INSERT INTO sandbox_sessions (
+        thread_id, expires_at, metadata
+    ) VALUES ($1, $2, $3::jsonb)
+    ON CONFLICT (thread_id) DO UPDATE SET last_accessed = NOW()
+    RETURNING *, (xmax = 0) AS created
+"""
+
 
 class SessionNotFoundError(Exception):
     """Session does not exist."""
@@ -17,6 +28,19 @@ class SessionExpiredError(Exception):
     """Session has expired."""
 
 
+def _check_session(thread_id: str, session: dict, expires_at: datetime) -> dict:
+    """Finish a _GET_OR_CREATE_SQL row: log a creation or reject an expired session.
+
+    Raises:
+        SessionExpiredError: If the session existed and has expired
+    """
+    if session.pop("created"):
+        logger.info("Created new session for thread %s, expires %s", thread_id, expires_at)
+    elif session["expires_at"] < datetime.now():
+        raise SessionExpiredError(f"Session {thread_id} expired at {session['expires_at']}")
+    return session
+
+
 class SandboxManager:
     """Manages sandbox session lifecycle and expiration.
 
@@ -58,39 +82,14 @@ class SandboxManager:
         Raises:
             SessionExpiredError: If session exists but has expired
         """
-        async with self.db.acquire() as conn:
-            # Try to get existing session
-            session = await conn.fetchrow(
-                "SELECT * FROM sandbox_sessions WHERE thread_id = $1", thread_id
-            )
-
-            if session:
-                # Check if expired
-                if session["expires_at"] < datetime.now():
-                    raise SessionExpiredError(
-                        f"Session {thread_id} expired at {session['expires_at']}"
-                    )
-
-                # Update last accessed
-                await self.update_last_accessed(thread_id)
-                return dict(session)
-
-            # Create new session
-            expires_at = datetime.now() + timedelta(days=self.default_expiration_days)
-            session = await conn.fetchrow(
-                """
-                INSERT INTO sandbox_sessions (
-                    thread_id, expires_at, metadata
-                ) VALUES ($1, $2, $3::jsonb)
-                RETURNING *
-            """,
-                thread_id,
-                expires_at,
-                json.dumps(metadata or {}),
-            )
-
-            logger.info(f"Created new session for thread {thread_id}, expires {expires_at}")
-            return dict(session) if session else {}
+        expires_at = datetime.now() + timedelta(days=self.default_expiration_days)
+        row = await self.db.fetchrow(
+            _GET_OR_CREATE_SQL, thread_id, expires_at, json.dumps(metadata or {})
+        )
+        if not row:  # pragma: no cover - the upsert always returns a row
+            return {}
+
+        return _check_session(thread_id, dict(row), expires_at)
 
     async def get_session(self, thread_id: str) -> dict:
         """Get existing session.
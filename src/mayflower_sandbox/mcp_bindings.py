@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import os
 import time
 from contextlib import AsyncExitStack
@@ -11,6 +12,27 @@ from mcp import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
 
 
+@functools.singledispatch
+def json_default(value: Any) -> Any:
+    """``json.dumps`` default hook for MCP results (type-dispatched)."""
+    return str(value)
+
+
+@json_default.register
+def _(value: str | int | float | bool | None) -> Any:
+    return value
+
+
+@json_default.register
+def _(value: list | tuple | set) -> Any:
+    return list(value)
+
+
+@json_default.register
+def _(value: dict) -> Any:
+    return value
+
+
 @dataclass
 class _SessionRecord:
     stack: AsyncExitStack
@@ -14,7 +14,7 @@ from typing import Any
 
 import asyncpg
 
-from .mcp_bindings import MCPBindingManager
+from .mcp_bindings import MCPBindingManager, json_default
 
 logger = logging.getLogger(__name__)
 
@@ -158,7 +158,7 @@ class MCPBridgeServer:
             if isinstance(raw_schemas, str):
                 raw_schemas = json.loads(raw_schemas)
             if raw_schemas:
-                self._validator.load_schemas(row["name"], raw_schemas)
+                await self._validator.load_schemas_async(row["name"], raw_schemas)
 
             servers[row["name"]] = {
                 "url": row["url"],
@@ -167,16 +167,7 @@ class MCPBridgeServer:
             }
         return servers
 
-    @staticmethod
-    def _json_default(value: Any) -> Any:
-        """JSON serializer for non-standard types."""
-        if isinstance(value, str | int | float | bool) or value is None:
-            return value
-        if isinstance(value, list | tuple | set):
-            return list(value)
-        if isinstance(value, dict):
-            return value
-        return str(value)
+    _json_default = staticmethod(json_default)
 
     async def _execute_mcp_call(
         self, server_name: str, tool_name: str, args: dict
@@ -6,19 +6,26 @@ Provides unified interface for executing Python code with automatic VFS sync.
 """
 
 import asyncio
+import base64
+import functools
+import hashlib
 import json
 import logging
 import os
+import shutil
 import subprocess  # nosec B404 - required for worker pool management
+import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
 import asyncpg
+import orjson
 
 from .bootstrap import write_bootstrap_files
+from .filesystem import FileNotFoundError as VFSFileNotFoundError
 from .filesystem import VirtualFilesystem
-from .mcp_bindings import MCPBindingManager
+from .mcp_bindings import MCPBindingManager, json_default
 
 if TYPE_CHECKING:
     from .mcp_bridge_server import MCPBridgeServer
@@ -26,6 +33,80 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Read size for streaming the shell executor's stdout
+_SHELL_STDOUT_CHUNK_SIZE = 256 * 1024
+
+
+@functools.cache
+def _package_file(name: str) -> Path | None:
+    """Resolve a file shipped next to this module (cached; package files don't move)."""
+    path = Path(__file__).parent / name
+    return path if path.exists() else None
+
+
+# (path, st_mtime_ns) of the deno binary that last passed _check_deno()
+_DENO_CHECKED: tuple[str, int] | None = None
+
+# VFS marker holding the bundle hash of the helpers last written for a thread
+_HELPERS_VERSION_PATH = "/home/pyodide/.helpers_version"
+
+# helpers_dir -> ((file count, max st_mtime_ns, total size), [(vfs_path, content), ...], bundle_hash)
+_HELPERS_CACHE: dict[Path, tuple[tuple[int, int, int], list[tuple[str, bytes]], str]] = {}
+
+
+def _load_helper_files(helpers_dir: Path) -> tuple[list[tuple[str, bytes]], str]:
+    """Return helper modules as (VFS path, content) plus a hash of the whole bundle.
+
+    Shared by all executors. Every call stats the helper tree, but the files
+    are only re-read when the newest mtime (of the .py files and the
+    directories holding them), the total size or the file count changes.
+    """
+    # Calculate VFS paths maintaining directory structure. os.walk avoids the
+    # per-entry Path objects of rglob(); sorting keeps the order (and bundle
+    # hash) deterministic. Directory mtimes catch renames and deletions.
+    entries: list[tuple[str, str]] = []
+    max_mtime_ns = total_size = 0
+    for dirpath, dirnames, filenames in os.walk(helpers_dir):
+        dirnames.sort()
+        max_mtime_ns = max(max_mtime_ns, os.stat(dirpath).st_mtime_ns)
+        rel_dir = os.path.relpath(dirpath, helpers_dir).replace(os.sep, "/")
+        prefix = "/home/pyodide/" if rel_dir == "." else f"/home/pyodide/{rel_dir}/"
+        for name in sorted(filenames):
+            if not name.endswith(".py"):
+                continue
+            file_path = os.path.join(dirpath, name)
+            st = os.stat(file_path)
+            max_mtime_ns = max(max_mtime_ns, st.st_mtime_ns)
+            total_size += st.st_size
+            entries.append((prefix + name, file_path))
+
+    signature = (len(entries), max_mtime_ns, total_size)
+    cached = _HELPERS_CACHE.get(helpers_dir)
+    if cached is not None and cached[0] == signature:
+        return cached[1], cached[2]
+
+    helper_files: list[tuple[str, bytes]] = []
+    for vfs_path, file_path in entries:
+        with open(file_path, "rb") as f:
+            helper_files.append((vfs_path, f.read()))
+    digest = hashlib.blake2b(digest_size=16)
+    for vfs_path, content in helper_files:
+        digest.update(vfs_path.encode())
+        digest.update(b"\0")
+        digest.update(content)
+        digest.update(b"\0")
+    bundle_hash = digest.hexdigest()
+
+    _HELPERS_CACHE[helpers_dir] = (signature, helper_files, bundle_hash)
+    return helper_files, bundle_hash
+
+
+def _decode_payload_bytes(value: str | list[int]) -> bytes:
+    """Decode binary data from a Deno result: base64 string, or legacy JSON int array."""
+    if isinstance(value, str):
+        return base64.b64decode(value)
+    return bytes(value)
+
 
 @dataclass
 class ExecutionResult:
@@ -102,8 +183,9 @@ class SandboxExecutor:
         # Verify Deno is installed
         self._check_deno()
 
-        # Track if helpers are loaded
+        # Track if helpers are loaded; the lock lets concurrent first calls share one preload
         self._helpers_loaded = False
+        self._helpers_lock = asyncio.Lock()
 
     @classmethod
     async def _ensure_mcp_bridge(cls, db_pool: asyncpg.Pool, thread_id: str) -> int | None:
@@ -162,26 +244,39 @@ class SandboxExecutor:
 
     def _get_executor_path(self) -> Path:
         """Get path to TypeScript executor."""
-        executor = Path(__file__).parent / "executor.ts"
-        if not executor.exists():
-            raise RuntimeError(f"Executor not found at {executor}")
+        executor = _package_file("executor.ts")
+        if executor is None:
+            raise RuntimeError(f"Executor not found at {Path(__file__).parent / 'executor.ts'}")
         return executor
 
     def _get_shell_executor_path(self) -> Path:
         """Get path to shell executor."""
-        executor = Path(__file__).parent / "shell_executor.ts"
-        if not executor.exists():
-            raise RuntimeError(f"Shell executor not found at {executor}")
+        executor = _package_file("shell_executor.ts")
+        if executor is None:
+            raise RuntimeError(
+                f"Shell executor not found at {Path(__file__).parent / 'shell_executor.ts'}"
+            )
         return executor
 
     def _get_deno_config_path(self) -> Path | None:
         """Get path to deno.json if present."""
-        config_path = Path(__file__).parent / "deno.json"
-        return config_path if config_path.exists() else None
+        return _package_file("deno.json")
 
     def _check_deno(self):
-        """Verify Deno is installed."""
+        """Verify Deno is installed.
+
+        The ``deno --version`` probe runs once per process and is repeated only
+        if the resolved binary changes (path or mtime).
+        """
+        global _DENO_CHECKED
+
+        deno_path = shutil.which("deno")
         try:
+            if deno_path is None:
+                raise FileNotFoundError("deno")
+            stamp = (deno_path, os.stat(deno_path).st_mtime_ns)
+            if stamp == _DENO_CHECKED:
+                return
             subprocess.run(  # nosec B603 B607 - hardcoded safe command
                 ["deno", "--version"],
                 check=True,
@@ -191,16 +286,15 @@ class SandboxExecutor:
             raise RuntimeError(
                 "Deno is not installed or not in PATH. Install from https://deno.land/"
             ) from e
+        _DENO_CHECKED = stamp
 
     def _build_command(
         self,
         code: str,
-        session_bytes: bytes | None = None,
-        session_metadata: dict | None = None,
         *,
         mcp_bridge_port: int | None = None,
     ) -> list[str]:
-        """Build Deno command."""
+        """Build Deno command (session state travels on stdin, see ``_prepare_stdin``)."""
         cmd: list[str] = [
             "deno",
             "run",
@@ -240,12 +334,6 @@ class SandboxExecutor:
         if self.stateful:
             cmd.append("-s")
 
-        if session_bytes:
-            cmd.extend(["-b", json.dumps(list(session_bytes))])
-
-        if session_metadata:
-            cmd.extend(["-m", json.dumps(session_metadata)])
-
         return cmd
 
     def _build_shell_command(self, command: str) -> list[str]:
@@ -274,40 +362,57 @@ class SandboxExecutor:
             cmd.extend(["--busybox-dir", busybox_dir])
         return cmd
 
-    def _prepare_stdin(self, files: dict[str, bytes]) -> bytes | None:
-        """Prepare files for stdin using MFS binary protocol."""
-        if not files:
+    def _prepare_stdin(
+        self,
+        files: dict[str, bytes],
+        session_bytes: bytes | None = None,
+        session_metadata: dict | None = None,
+    ) -> list[bytes | memoryview] | None:
+        """Prepare files (and optional session state) for stdin using MFS binary protocol.
+
+        Returns the frame as a list of buffers to be written in order, so file
+        contents are handed to the pipe without being copied into one blob.
+        """
+        if not files and not session_bytes and not session_metadata:
             return None
 
         # MFS protocol: "MFS\x01" + length(4) + JSON metadata + file contents
-        metadata = {
+        # [+ session bytes]. Session state rides along as raw bytes instead of a
+        # JSON int array on argv, which bloats ~4x and can hit ARG_MAX.
+        metadata: dict[str, Any] = {
             "files": [{"path": path, "size": len(content)} for path, content in files.items()]
         }
+        if session_bytes or session_metadata:
+            metadata["session"] = {
+                "size": len(session_bytes or b""),
+                "metadata": session_metadata,
+            }
 
-        metadata_json = json.dumps(metadata).encode("utf-8")
+        metadata_json = orjson.dumps(metadata)
 
         # Header: magic + version + length
         header = b"MFS\x01" + len(metadata_json).to_bytes(4, byteorder="big")
 
-        # Concatenate: header + metadata + all file contents
-        result = bytearray(header)
-        result.extend(metadata_json)
+        # Sequence: header + metadata + all file contents + session bytes
+        chunks: list[bytes | memoryview] = [header, metadata_json]
+        chunks.extend(memoryview(content) for content in files.values())
 
-        for content in files.values():
-            result.extend(content)
+        if session_bytes:
+            chunks.append(memoryview(session_bytes))
 
-        return bytes(result)
+        return chunks
 
-    async def _check_resource_quotas(self) -> tuple[bool, str | None]:
+    def _check_resource_quotas(self, num_files: int, total_size: int) -> tuple[bool, str | None]:
         """
         Check if resource quotas are exceeded.
 
+        Args:
+            num_files: Number of files currently in the VFS
+            total_size: Total size of those files in bytes
+
         Returns:
             (within_limits, error_message) - error_message is None if within limits
         """
-        vfs_files = await self.vfs.list_files()
-        num_files = len(vfs_files)
-        total_size = sum(f["size"] for f in vfs_files)
         total_size_mb = total_size / 1024 / 1024
 
         if num_files >= self.max_files:
@@ -325,32 +430,45 @@ class SandboxExecutor:
         return True, None
 
     async def _preload_helpers(self) -> None:
-        """Load all helper modules into VFS at /home/pyodide/"""
+        """Load all helper modules into VFS at /home/pyodide/ (once per executor)."""
         if self._helpers_loaded:
             return
 
+        async with self._helpers_lock:
+            # Another caller may have finished the preload while we waited
+            if self._helpers_loaded:
+                return
+            await self._upload_helpers()
+            self._helpers_loaded = True
+
+    async def _upload_helpers(self) -> None:
+        """Write the helper bundle to the VFS unless this thread already has it."""
         helpers_dir = Path(__file__).parent / "helpers"
 
         if not helpers_dir.exists():
             logger.warning(f"Helpers directory not found at {helpers_dir}")
-            self._helpers_loaded = True
             return
 
-        helper_count = 0
-        for py_file in helpers_dir.rglob("*.py"):
-            # Calculate VFS path maintaining directory structure
-            rel_path = py_file.relative_to(helpers_dir)
-            vfs_path = f"/home/pyodide/{rel_path}"
+        # Directory walk and file reads are blocking; keep them off the event loop
+        helper_files, bundle_hash = await asyncio.to_thread(_load_helper_files, helpers_dir)
 
-            # Read file content
-            content = py_file.read_bytes()
+        # Skip the upload if this thread already has the current helper bundle
+        try:
+            marker = await self.vfs.read_file(_HELPERS_VERSION_PATH)
+        except VFSFileNotFoundError:
+            marker = None
+        if marker is not None and bytes(marker["content"]) == bundle_hash.encode():
+            logger.debug("Helpers already up to date in VFS for thread %s", self.thread_id)
+            return
 
-            # Write to VFS (persists across executions)
-            await self.vfs.write_file(vfs_path, content)
-            helper_count += 1
+        # Write all helpers and the version marker in one statement (persists across executions)
+        await self.vfs.write_files_bulk(
+            [*helper_files, (_HELPERS_VERSION_PATH, bundle_hash.encode())]
+        )
 
-        logger.info(f"Preloaded {helper_count} helper modules into VFS for thread {self.thread_id}")
-        self._helpers_loaded = True
+        logger.info(
+            "Preloaded %d helper modules into VFS for thread %s", len(helper_files), self.thread_id
+        )
 
     async def _get_mcp_server_configs(self) -> dict[str, dict[str, Any]]:
         async with self.db_pool.acquire() as conn:
@@ -385,15 +503,7 @@ class SandboxExecutor:
             }
         return servers
 
-    @staticmethod
-    def _json_default(value: Any) -> Any:
-        if isinstance(value, str | int | float | bool) or value is None:
-            return value
-        if isinstance(value, list | tuple | set):
-            return list(value)
-        if isinstance(value, dict):
-            return value
-        return str(value)
+    _json_default = staticmethod(json_default)
 
     async def _handle_mcp_request(
         self,
@@ -548,14 +658,16 @@ class SandboxExecutor:
 
     async def _save_created_files(self, result: dict) -> list[str]:
         """Save created files from execution result to VFS."""
-        created_files = []
+        created_files: list[str] = []
         if result.get("created_files") and result.get("success"):
-            for file_info in result["created_files"]:
-                file_path = file_info["path"]
-                file_content = bytes(file_info["content"])
-                await self.vfs.write_file(file_path, file_content)
-                created_files.append(file_path)
-            logger.debug(f"Created {len(created_files)} files via pool")
+            files = [
+                (file_info["path"], _decode_payload_bytes(file_info["content"]))
+                for file_info in result["created_files"]
+            ]
+            # One upsert for all files instead of a round-trip per file
+            await self.vfs.write_files_bulk(files)
+            created_files = [file_path for file_path, _ in files]
+            logger.debug("Created %d files via pool", len(created_files))
         return created_files
 
     async def _detect_vfs_fallback_files(
@@ -565,12 +677,15 @@ class SandboxExecutor:
         if created_files or not result.get("success"):
             return created_files
 
-        after_files = {f["file_path"] for f in await self.vfs.list_files()}
+        # Paths only; list_files() would fetch every file's content
+        _, _, after_files = await self.vfs.snapshot_for_execute()
         vfs_created = list(after_files - before_files)
         if vfs_created:
             logger.info(
-                f"VFS fallback detected {len(vfs_created)} files from compiled libraries "
-                f"for thread {self.thread_id}: {vfs_created}"
+                "VFS fallback detected %d files from compiled libraries for thread %s: %s",
+                len(vfs_created),
+                self.thread_id,
+                vfs_created,
             )
             return vfs_created
         return created_files
@@ -582,18 +697,17 @@ class SandboxExecutor:
         session_metadata: dict | None,
     ) -> ExecutionResult:
         """Execute code using the worker pool (fast path)."""
-        import hashlib
-        import time
-
         start_time = time.time()
-        code_hash = hashlib.sha256(code.encode()).hexdigest()
+        # Log-correlation key only (not a security commitment), so a fast hash suffices
+        code_bytes = code.encode()
+        code_hash = hashlib.blake2b(code_bytes, digest_size=16).hexdigest()
 
         logger.info(
             "Code execution started (pool)",
             extra={
                 "thread_id": self.thread_id,
                 "code_hash": code_hash,
-                "code_size": len(code),
+                "code_size": len(code_bytes),
                 "allow_net": self.allow_net,
                 "timeout": self.timeout_seconds,
                 "stateful": self.stateful,
@@ -601,8 +715,16 @@ class SandboxExecutor:
         )
 
         try:
+            # Pre-load helpers and bootstrap
+            await self._preload_helpers()
+            await self._bootstrap_site_packages()
+
+            # One metadata-only query serves both the quota check and the
+            # before-set for fallback detection (compiled libraries issue)
+            num_files, total_size, before_vfs_files = await self.vfs.snapshot_for_execute()
+
             # Check resource quotas
-            within_limits, quota_error = await self._check_resource_quotas()
+            within_limits, quota_error = self._check_resource_quotas(num_files, total_size)
             if not within_limits:
                 return ExecutionResult(
                     success=False,
@@ -620,13 +742,6 @@ class SandboxExecutor:
             if self._pool is None:
                 raise RuntimeError("Worker pool not available")
 
-            # Pre-load helpers and bootstrap
-            await self._preload_helpers()
-            await self._bootstrap_site_packages()
-
-            # Track existing VFS files for fallback detection (compiled libraries issue)
-            before_vfs_files = {f["file_path"] for f in await self.vfs.list_files()}
-
             # Build code with preludes
             prelude_parts = [self._build_site_prelude()]
 
@@ -678,7 +793,7 @@ class SandboxExecutor:
                 result=result.get("result"),
                 execution_time=execution_time,
                 created_files=created_files if created_files else None,
-                session_bytes=bytes(result["session_bytes"])
+                session_bytes=_decode_payload_bytes(result["session_bytes"])
                 if result.get("session_bytes")
                 else None,
                 session_metadata=result.get("session_metadata"),
@@ -713,19 +828,80 @@ class SandboxExecutor:
         """
         return await self._execute_with_pool(code, session_bytes, session_metadata)
 
+    @staticmethod
+    async def _feed_stdin(
+        proc: asyncio.subprocess.Process, chunks: list[bytes | memoryview] | None
+    ) -> None:
+        """Write the stdin chunks and close the pipe, tolerating early child exit."""
+        if proc.stdin is None:
+            return
+        try:
+            for chunk in chunks or ():
+                proc.stdin.write(chunk)
+                await proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # child exited before reading stdin; its output explains why
+        finally:
+            proc.stdin.close()
+
+    @staticmethod
+    async def _read_last_line(stream: asyncio.StreamReader | None) -> bytes:
+        """Consume a stream in chunks, returning only the last non-empty line.
+
+        Reads fixed-size chunks rather than lines, so an arbitrarily long line
+        (the JSON result with created files) never hits the reader's line limit.
+        """
+        last_line = b""
+        if stream is None:
+            return last_line
+        pending = bytearray()
+        while chunk := await stream.read(_SHELL_STDOUT_CHUNK_SIZE):
+            pending += chunk
+            if b"\n" not in chunk:
+                continue
+            complete, _, rest = pending.rpartition(b"\n")
+            for line in reversed(complete.split(b"\n")):
+                if line.strip():
+                    last_line = bytes(line)
+                    break
+            pending = rest
+        if pending.strip():
+            last_line = bytes(pending)
+        return last_line
+
+    @staticmethod
+    async def _read_stream(stream: asyncio.StreamReader | None) -> bytes:
+        """Read a stream to EOF (empty if the pipe isn't open)."""
+        if stream is None:
+            return b""
+        return await stream.read()
+
+    @staticmethod
+    async def _kill_process(proc: asyncio.subprocess.Process, tasks: list[asyncio.Task]) -> None:
+        """Kill and reap a subprocess, cancelling the tasks still talking to it."""
+        if proc.returncode is None:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass  # exited in the meantime
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await proc.wait()
+
     async def execute_shell(self, command: str) -> ExecutionResult:
         """Execute shell command using busybox-wasm stub with VFS integration."""
-        import time
-
         start_time = time.time()
         cmd = self._build_shell_command(command)
 
         # Track existing VFS files for fallback detection
-        before_vfs_files = {f["file_path"] for f in await self.vfs.list_files()}
+        _, _, before_vfs_files = await self.vfs.snapshot_for_execute()
 
         files_dict = await self.vfs.get_all_files_for_pyodide()
         stdin_payload = self._prepare_stdin(files_dict)
 
+        proc: asyncio.subprocess.Process | None = None
+        tasks: list[asyncio.Task] = []
         try:
             proc = await asyncio.create_subprocess_exec(
                 *cmd,
@@ -733,14 +909,20 @@ class SandboxExecutor:
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
             )
-            stdout_bytes, stderr_bytes = await asyncio.wait_for(
-                proc.communicate(stdin_payload),
-                timeout=self.timeout_seconds,
+            # Stream stdout and keep only the final (JSON result) line, so peak
+            # memory is bounded by that line rather than the whole output.
+            tasks = [
+                asyncio.ensure_future(self._feed_stdin(proc, stdin_payload)),
+                asyncio.ensure_future(self._read_last_line(proc.stdout)),
+                asyncio.ensure_future(self._read_stream(proc.stderr)),
+                asyncio.ensure_future(proc.wait()),
+            ]
+            _, last_line, stderr_bytes, _ = await asyncio.wait_for(
+                asyncio.gather(*tasks), timeout=self.timeout_seconds
             )
         except asyncio.TimeoutError:
             if proc is not None:
-                proc.kill()
-                await proc.wait()
+                await self._kill_process(proc, tasks)
             return ExecutionResult(
                 success=False,
                 stdout="",
@@ -749,6 +931,9 @@ class SandboxExecutor:
                 exit_code=124,
             )
         except Exception as e:
+            # gather() doesn't cancel the other tasks when one fails
+            if proc is not None:
+                await self._kill_process(proc, tasks)
             return ExecutionResult(
                 success=False,
                 stdout="",
@@ -757,10 +942,9 @@ class SandboxExecutor:
                 exit_code=1,
             )
 
-        stdout_text = stdout_bytes.decode("utf-8", errors="replace").strip()
         stderr_text = stderr_bytes.decode("utf-8", errors="replace").strip()
 
-        if not stdout_text:
+        if not last_line:
             return ExecutionResult(
                 success=False,
                 stdout="",
@@ -770,11 +954,12 @@ class SandboxExecutor:
             )
 
         try:
-            result = json.loads(stdout_text.splitlines()[-1])
-        except json.JSONDecodeError as e:
+            # Parse the raw bytes; no UTF-8 decode of the (possibly multi-MB) line first
+            result = orjson.loads(last_line)
+        except orjson.JSONDecodeError as e:
             return ExecutionResult(
                 success=False,
-                stdout=stdout_text,
+                stdout=last_line.decode("utf-8", errors="replace").strip(),
                 stderr=f"Shell executor JSON parse error: {e}\n{stderr_text}",
                 execution_time=time.time() - start_time,
                 exit_code=1,
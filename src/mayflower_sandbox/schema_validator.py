@@ -3,31 +3,281 @@ Schema Validator - Runtime validation for MCP tool calls.
 
 Provides jsonschema-based validation at the bridge level for security enforcement.
 This ensures all MCP calls are validated even if sandbox-side validation is bypassed.
+
+When the optional ``fastjsonschema`` package is installed (``fast-validation``
+extra), draft-4/6/7 schemas are additionally compiled to specialized Python
+functions that accept valid arguments without walking the schema tree. The
+jsonschema validator remains authoritative and produces all error messages.
+``MCPSchemaValidator.precompile_to_disk`` writes those functions out as
+Python modules so later processes import them instead of compiling.
 """
 
+import asyncio
+import hashlib
+import importlib.util
+import json
 import logging
+import os
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Any
 
-from jsonschema.validators import validator_for
+import orjson
+from jsonschema.validators import Draft4Validator, Draft6Validator, Draft7Validator, validator_for
+
+try:
+    import fastjsonschema
+
+    FASTJSONSCHEMA_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    FASTJSONSCHEMA_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Default number of compiled schemas kept in memory per validator
+DEFAULT_MAX_CACHED = 512
+
+# Drafts whose semantics fastjsonschema implements
+_FAST_DRAFTS = (Draft4Validator, Draft6Validator, Draft7Validator)
+
+# 2019-09/2020-12 keywords fastjsonschema would silently ignore
+_UNSUPPORTED_KEYWORDS = frozenset(
+    {
+        "$anchor",
+        "$dynamicAnchor",
+        "$dynamicRef",
+        "$recursiveAnchor",
+        "$recursiveRef",
+        "dependentRequired",
+        "dependentSchemas",
+        "maxContains",
+        "minContains",
+        "prefixItems",
+        "unevaluatedItems",
+        "unevaluatedProperties",
+    }
+)
+
+# Draft-7 keywords that 2020-12 (the default without "$schema") treats differently
+_DIVERGENT_KEYWORDS = frozenset({"additionalItems", "dependencies"})
+
+
+def _is_fast_compatible(node: Any, implicit_draft: bool) -> bool:
+    """Check whether fastjsonschema would evaluate a schema tree the same way as jsonschema."""
+    if isinstance(node, dict):
+        if not _UNSUPPORTED_KEYWORDS.isdisjoint(node):
+            return False
+        # fastjsonschema divides as floats, so it accepts e.g. 0.07 for 0.01
+        # and 2**53 + 1 for 2; a property merely named multipleOf is a dict
+        if "multipleOf" in node and not isinstance(node["multipleOf"], dict):
+            return False
+        if implicit_draft and (
+            not _DIVERGENT_KEYWORDS.isdisjoint(node)
+            or isinstance(node.get("items"), list)
+            or ("$ref" in node and len(node) > 1)
+        ):
+            return False
+        return all(_is_fast_compatible(value, implicit_draft) for value in node.values())
+    if isinstance(node, list):
+        return all(_is_fast_compatible(item, implicit_draft) for item in node)
+    return True
+
+
+def _is_fast_eligible(schema: dict[str, Any], validator_cls: type) -> bool:
+    """Check whether a schema may be validated by fastjsonschema."""
+    if not FASTJSONSCHEMA_AVAILABLE:
+        return False
+    implicit_draft = "$schema" not in schema
+    if not implicit_draft and not issubclass(validator_cls, _FAST_DRAFTS):
+        return False
+    return _is_fast_compatible(schema, implicit_draft)
+
+
+def _precompiled_path(directory: Path, key: bytes) -> Path:
+    """Module file holding the generated validator for a schema key."""
+    return directory / f"mcp_schema_{key.hex()}.py"
+
+
+def _import_precompiled(path: Path) -> Callable[[Any], Any]:
+    """Import a module written by precompile_to_disk and return its validate function."""
+    spec = importlib.util.spec_from_file_location(f"_{path.stem}", path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load precompiled validator {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.validate
+
+
+def _compile_fast(
+    server_name: str,
+    tool_name: str,
+    schema: dict[str, Any],
+    validator_cls: type,
+    precompiled_path: Path | None = None,
+) -> Callable[[Any], Any] | None:
+    """Compile a fastjsonschema validator, or return None if the schema isn't eligible.
+
+    A module previously written to precompiled_path is imported instead of compiling.
+    """
+    if not _is_fast_eligible(schema, validator_cls):
+        return None
+    if precompiled_path is not None and precompiled_path.exists():
+        try:
+            return _import_precompiled(precompiled_path)
+        except Exception as e:
+            logger.warning(f"Ignoring precompiled validator {precompiled_path}: {e}")
+    try:
+        return fastjsonschema.compile(schema, use_default=False)
+    except Exception as e:
+        logger.debug(f"fastjsonschema cannot compile {server_name}.{tool_name}: {e}")
+        return None
+
+
+def _schema_key(schema: dict[str, Any]) -> bytes:
+    """Content hash of a schema's canonical JSON form."""
+    try:
+        canonical = orjson.dumps(schema, option=orjson.OPT_SORT_KEYS)
+    except orjson.JSONEncodeError:
+        # orjson rejects integers beyond 64 bits, e.g. a huge "maximum"
+        canonical = json.dumps(schema, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(canonical, digest_size=16).digest()
+
+
+@dataclass
+class _CompiledSchema:
+    """Compiled validators for one schema, shared by every tool that uses it."""
+
+    # Instance returned by jsonschema.validator_for()
+    validator: Any
+    # Compiled fastjsonschema function, only for eligible schemas
+    fast: Callable[[Any], Any] | None
+    # Root-level object constraints checked before any schema walk
+    required: tuple[str, ...] = ()
+    min_properties: int | None = None
+    max_properties: int | None = None
+
+    def precheck(self, args: dict[str, Any]) -> list[str]:
+        """Report missing required keys or a bad property count without a schema walk."""
+        missing = [key for key in self.required if key not in args]
+        if missing:
+            return [f"root: {key!r} is a required property" for key in missing]
+        if self.min_properties is not None and len(args) < self.min_properties:
+            if self.min_properties == 1:
+                return [f"root: {args!r} should be non-empty"]
+            return [f"root: {args!r} does not have enough properties"]
+        if self.max_properties is not None and len(args) > self.max_properties:
+            return [f"root: {args!r} has too many properties"]
+        return []
+
+
+def _root_checks(schema: dict[str, Any]) -> dict[str, Any]:
+    """Extract root-level required/minProperties/maxProperties for the precheck."""
+    # Draft 7 and earlier ignore keywords next to a root $ref
+    if "$ref" in schema:
+        return {}
+
+    def _count(value: Any) -> int | None:
+        return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+    required = schema.get("required")
+    if not isinstance(required, list) or not all(isinstance(k, str) for k in required):
+        required = []
+    return {
+        "required": tuple(required),
+        "min_properties": _count(schema.get("minProperties")),
+        "max_properties": _count(schema.get("maxProperties")),
+    }
+
+
+def _compile_schema(
+    server_name: str,
+    tool_name: str,
+    schema: dict[str, Any],
+    precompiled_path: Path | None = None,
+) -> _CompiledSchema:
+    """Check a schema and compile its validators."""
+    # Auto-detect schema version and create validator
+    validator_cls = validator_for(schema)
+    # Check schema validity
+    validator_cls.check_schema(schema)
+    return _CompiledSchema(
+        validator=validator_cls(schema),
+        fast=_compile_fast(server_name, tool_name, schema, validator_cls, precompiled_path),
+        **_root_checks(schema),
+    )
+
+
+def _compile_pending(
+    server_name: str,
+    pending: dict[bytes, tuple[str, dict[str, Any]]],
+    precompiled_dir: Path | None = None,
+) -> dict[bytes, _CompiledSchema]:
+    """Compile schemas by key, skipping invalid ones (they are reported on install)."""
+    compiled: dict[bytes, _CompiledSchema] = {}
+    for key, (tool_name, schema) in pending.items():
+        path = _precompiled_path(precompiled_dir, key) if precompiled_dir else None
+        try:
+            compiled[key] = _compile_schema(server_name, tool_name, schema, path)
+        except Exception as e:
+            logger.debug(f"Deferred invalid schema for {server_name}.{tool_name}: {e}")
+    return compiled
+
 
 class MCPSchemaValidator:
     """
     Validates MCP tool call arguments against JSON schemas.
 
-    Caches compiled validators per (server, tool) for performance.
+    Caches compiled validators by schema content, so identical schemas shared
+    across tools and servers are compiled once. At most ``max_cached`` compiled
+    schemas are kept; the least recently used are evicted and recompiled from
+    the raw schema on their next use.
+    With ``precompiled_dir`` set, fast validators written there by
+    ``precompile_to_disk`` are imported instead of compiled. Only point it at
+    a trusted directory, since its modules are executed.
     Fails open for unknown tools to maintain backwards compatibility.
     """
 
-    def __init__(self) -> None:
-        # Cache: {server_name: {tool_name: validator}}
-        # Validators are instances returned by jsonschema.validator_for()
-        self._validators: dict[str, dict[str, Any]] = {}
-        # Raw schemas for introspection
+    def __init__(
+        self,
+        max_cached: int = DEFAULT_MAX_CACHED,
+        precompiled_dir: str | Path | None = None,
+    ) -> None:
+        if max_cached < 1:
+            raise ValueError("max_cached must be at least 1")
+        self._max_cached = max_cached
+        self._precompiled_dir = Path(precompiled_dir) if precompiled_dir else None
+        # {server_name: {tool_name: schema content key}}
+        self._schema_keys: dict[str, dict[str, bytes]] = {}
+        # Content-addressed LRU of compiled schemas, bounded by max_cached
+        self._compiled: OrderedDict[bytes, _CompiledSchema] = OrderedDict()
+        # Raw schemas, used for introspection and recompiling evicted entries
         self._schemas: dict[str, dict[str, dict[str, Any]]] = {}
 
+    def _get_compiled(
+        self,
+        key: bytes,
+        server_name: str,
+        tool_name: str,
+        schema: dict[str, Any],
+        precompiled: _CompiledSchema | None = None,
+    ) -> _CompiledSchema:
+        """Return the compiled schema for key, compiling and caching it on a miss."""
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            self._compiled.move_to_end(key)
+            return compiled
+
+        if precompiled is None:
+            path = _precompiled_path(self._precompiled_dir, key) if self._precompiled_dir else None
+            precompiled = _compile_schema(server_name, tool_name, schema, path)
+        compiled = precompiled
+        self._compiled[key] = compiled
+        if len(self._compiled) > self._max_cached:
+            self._compiled.popitem(last=False)
+        return compiled
+
     def load_schemas(self, server_name: str, schemas: dict[str, dict[str, Any]]) -> None:
         """
         Load and compile schemas for a server's tools.
@@ -36,8 +286,50 @@ class MCPSchemaValidator:
             server_name: Name of the MCP server (e.g., "github")
             schemas: Dict mapping tool_name to inputSchema
         """
-        if server_name not in self._validators:
-            self._validators[server_name] = {}
+        self._install_schemas(server_name, schemas, {})
+
+    async def load_schemas_async(
+        self, server_name: str, schemas: dict[str, dict[str, Any]]
+    ) -> None:
+        """
+        Load schemas like load_schemas, compiling uncached ones in a worker thread.
+
+        Keeps compilation off the event loop; the caches themselves are only
+        updated on the calling thread once compilation has finished.
+
+        Args:
+            server_name: Name of the MCP server (e.g., "github")
+            schemas: Dict mapping tool_name to inputSchema
+        """
+        pending: dict[bytes, tuple[str, dict[str, Any]]] = {}
+        for tool_name, schema in schemas.items():
+            if not schema:
+                continue
+            try:
+                key = _schema_key(schema)
+            except Exception as e:
+                # Reported as a warning by _install_schemas
+                logger.debug(f"Cannot hash schema for {server_name}.{tool_name}: {e}")
+                continue
+            if key not in self._compiled:
+                pending.setdefault(key, (tool_name, schema))
+
+        precompiled: dict[bytes, _CompiledSchema] = {}
+        if pending:
+            precompiled = await asyncio.to_thread(
+                _compile_pending, server_name, pending, self._precompiled_dir
+            )
+        self._install_schemas(server_name, schemas, precompiled)
+
+    def _install_schemas(
+        self,
+        server_name: str,
+        schemas: dict[str, dict[str, Any]],
+        precompiled: dict[bytes, _CompiledSchema],
+    ) -> None:
+        """Register a server's schemas, compiling any not found in precompiled."""
+        if server_name not in self._schema_keys:
+            self._schema_keys[server_name] = {}
             self._schemas[server_name] = {}
 
         for tool_name, schema in schemas.items():
@@ -45,25 +337,81 @@ class MCPSchemaValidator:
                 continue
 
             try:
-                # Auto-detect schema version and create validator
-                validator_cls = validator_for(schema)
-                # Check schema validity
-                validator_cls.check_schema(schema)
-                # Create and cache validator instance
-                self._validators[server_name][tool_name] = validator_cls(schema)
+                key = _schema_key(schema)
+                self._get_compiled(key, server_name, tool_name, schema, precompiled.get(key))
+                self._schema_keys[server_name][tool_name] = key
                 self._schemas[server_name][tool_name] = schema
-                logger.debug(f"Loaded schema for {server_name}.{tool_name}")
+                logger.debug("Loaded schema for %s.%s", server_name, tool_name)
             except Exception as e:
                 logger.warning(f"Failed to compile schema for {server_name}.{tool_name}: {e}")
 
     def unload_server(self, server_name: str) -> None:
         """Remove all cached validators for a server."""
-        self._validators.pop(server_name, None)
+        keys = self._schema_keys.pop(server_name, {})
         self._schemas.pop(server_name, None)
 
+        # Drop compiled schemas no other server still uses
+        in_use = {key for tools in self._schema_keys.values() for key in tools.values()}
+        for key in set(keys.values()) - in_use:
+            self._compiled.pop(key, None)
+
+    def precompile_to_disk(self, server_name: str, directory: str | Path) -> list[Path]:
+        """
+        Write fast validators for a server's loaded schemas as Python modules.
+
+        Each eligible schema is generated with ``fastjsonschema.compile_to_code``
+        into ``mcp_schema_<content hash>.py``, so identical schemas share a file
+        and a changed schema never picks up a stale one. The modules are
+        installed immediately; validators created with ``precompiled_dir`` set
+        to the same directory (e.g. in a container image) import them instead
+        of compiling.
+
+        Args:
+            server_name: Name of an MCP server whose schemas are loaded
+            directory: Directory to write the modules to (created if missing)
+
+        Returns:
+            Paths of the modules written
+
+        Raises:
+            RuntimeError: If fastjsonschema is not installed
+        """
+        if not FASTJSONSCHEMA_AVAILABLE:
+            raise RuntimeError(
+                "fastjsonschema is required to precompile validators. "
+                "Install with: pip install mayflower-sandbox[fast-validation]"
+            )
+
+        target = Path(directory)
+        target.mkdir(parents=True, exist_ok=True)
+        written: list[Path] = []
+
+        for tool_name, key in self._schema_keys.get(server_name, {}).items():
+            schema = self._schemas[server_name][tool_name]
+            path = _precompiled_path(target, key)
+            if path in written or not _is_fast_eligible(schema, validator_for(schema)):
+                continue
+            try:
+                code = fastjsonschema.compile_to_code(schema, use_default=False)
+            except Exception as e:
+                logger.debug(f"fastjsonschema cannot compile {server_name}.{tool_name}: {e}")
+                continue
+
+            # Write atomically so a concurrent import never sees a partial module
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(code, encoding="utf-8")
+            os.replace(tmp_path, path)
+            written.append(path)
+
+            compiled = self._get_compiled(key, server_name, tool_name, schema)
+            compiled.fast = _import_precompiled(path)
+
+        logger.debug(f"Precompiled {len(written)} validator(s) for {server_name} to {target}")
+        return written
+
     def has_schema(self, server_name: str, tool_name: str) -> bool:
         """Check if a schema exists for the given server/tool."""
-        return server_name in self._validators and tool_name in self._validators[server_name]
+        return server_name in self._schema_keys and tool_name in self._schema_keys[server_name]
 
     def get_schema(self, server_name: str, tool_name: str) -> dict[str, Any] | None:
         """Get the raw schema for a tool, if loaded."""
@@ -88,24 +436,96 @@ class MCPSchemaValidator:
         """
         # Fail open if no schema loaded (backwards compatibility)
         if not self.has_schema(server_name, tool_name):
-            logger.debug(f"No schema for {server_name}.{tool_name}, skipping validation")
+            logger.debug("No schema for %s.%s, skipping validation", server_name, tool_name)
             return []
 
-        validator = self._validators[server_name][tool_name]
-        errors: list[str] = []
-
-        for error in validator.iter_errors(args):
-            # Format error message with path context
-            path = ".".join(str(p) for p in error.absolute_path) if error.absolute_path else "root"
-            errors.append(f"{path}: {error.message}")
+        compiled = self._get_compiled(
+            self._schema_keys[server_name][tool_name],
+            server_name,
+            tool_name,
+            self._schemas[server_name][tool_name],
+        )
+        # Most malformed calls miss a required key; report those without a full walk
+        errors = compiled.precheck(args)
+        if not errors:
+            errors = self._collect_errors(compiled, args)
 
         if errors:
             logger.warning(
-                f"Validation failed for {server_name}.{tool_name}: {len(errors)} error(s)"
+                "Validation failed for %s.%s: %d error(s)", server_name, tool_name, len(errors)
             )
 
         return errors
 
+    @staticmethod
+    def _collect_errors(compiled: _CompiledSchema, args: dict[str, Any]) -> list[str]:
+        """Run the full schema validation and format any errors."""
+        if compiled.fast is not None:
+            try:
+                compiled.fast(args)
+                return []
+            except fastjsonschema.JsonSchemaException:
+                # Re-run through jsonschema for authoritative error messages
+                pass
+
+        errors: list[str] = []
+
+        for error in compiled.validator.iter_errors(args):
+            # Format error message with path context; most segments are
+            # already property names, only array indices need converting
+            parts = error.absolute_path
+            if parts:
+                path = ".".join([p if type(p) is str else str(p) for p in parts])
+            else:
+                path = "root"
+            errors.append(f"{path}: {error.message}")
+
+        return errors
+
+    def validate_many(
+        self,
+        calls: list[tuple[str, str, dict[str, Any]]],
+    ) -> list[list[str]]:
+        """
+        Validate several tool calls, e.g. all tool calls of one model step.
+
+        Each distinct tool's compiled schema is looked up once for the batch.
+
+        Args:
+            calls: (server_name, tool_name, args) for each call
+
+        Returns:
+            Validation error messages per call, in order (empty if valid or no schema)
+        """
+        results: list[list[str]] = []
+        resolved: dict[tuple[str, str], _CompiledSchema | None] = {}
+
+        for server_name, tool_name, args in calls:
+            tool = (server_name, tool_name)
+            if tool not in resolved:
+                key = self._schema_keys.get(server_name, {}).get(tool_name)
+                resolved[tool] = (
+                    None
+                    if key is None
+                    else self._get_compiled(
+                        key, server_name, tool_name, self._schemas[server_name][tool_name]
+                    )
+                )
+            compiled = resolved[tool]
+
+            if compiled is None:
+                # Fail open if no schema loaded (backwards compatibility)
+                results.append([])
+                continue
+            errors = compiled.precheck(args) or self._collect_errors(compiled, args)
+            if errors:
+                logger.warning(
+                    "Validation failed for %s.%s: %d error(s)", server_name, tool_name, len(errors)
+                )
+            results.append(errors)
+
+        return results
+
     def validate_or_raise(
         self,
         server_name: str,
@@ -130,26 +550,24 @@ class MCPSchemaValidator:
 
     def list_servers(self) -> list[str]:
         """List all servers with loaded schemas."""
-        return list(self._validators.keys())
+        return list(self._schema_keys.keys())
 
     def list_tools(self, server_name: str) -> list[str]:
         """List all tools with schemas for a server."""
-        return list(self._validators.get(server_name, {}).keys())
+        return list(self._schema_keys.get(server_name, {}).keys())
 
 
-# Global validator instance for the bridge
-_global_validator: MCPSchemaValidator | None = None
+# Global validator instance for the bridge, created at import so lookups
+# on the request path don't need a None check
+_global_validator = MCPSchemaValidator()
 
 
 def get_validator() -> MCPSchemaValidator:
-    """Get or create the global validator instance."""
-    global _global_validator
-    if _global_validator is None:
-        _global_validator = MCPSchemaValidator()
+    """Get the global validator instance."""
     return _global_validator
 
 
 def reset_validator() -> None:
     """Reset the global validator (for testing)."""
     global _global_validator
-    _global_validator = None
+    _global_validator = MCPSchemaValidator()
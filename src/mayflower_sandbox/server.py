@@ -5,6 +5,7 @@ Provides endpoints for downloading files created by sandbox executions.
 """
 
 import logging
+from datetime import datetime, timedelta, timezone
 
 import asyncpg
 from aiohttp import web
@@ -14,6 +15,34 @@ from mayflower_sandbox.filesystem import VirtualFilesystem
 
 logger = logging.getLogger(__name__)
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Files can be overwritten at any time, so clients must revalidate every use
+_CACHE_CONTROL = "no-cache"
+
+
+def _file_validators(file_info: dict) -> tuple[str, datetime]:
+    """Build the ETag value and Last-Modified time for a VFS file.
+
+    Every write sets modified_at to the transaction time (microsecond
+    precision), so (size, modified_at) identifies a version of the file.
+    """
+    modified_at = file_info["modified_at"].astimezone(timezone.utc)
+    version = (modified_at - _EPOCH) // timedelta(microseconds=1)
+    # HTTP dates have one-second resolution
+    return f"{file_info['size']:x}-{version:x}", modified_at.replace(microsecond=0)
+
+
+def _is_not_modified(request: web.Request, etag: str, last_modified: datetime) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since (If-None-Match takes precedence)."""
+    if_none_match = request.if_none_match
+    if if_none_match is not None:
+        return any(tag.value in (etag, "*") for tag in if_none_match)
+    if_modified_since = request.if_modified_since
+    if if_modified_since is not None:
+        return last_modified <= if_modified_since
+    return False
+
 
 class FileServer:
     """HTTP server for serving sandbox files."""
@@ -41,8 +70,7 @@ class FileServer:
     async def health_check(self, request: web.Request) -> web.Response:
         """Health check endpoint with database connectivity verification."""
         try:
-            async with self.db_pool.acquire() as conn:
-                await conn.fetchval("SELECT 1")
+            await self.db_pool.fetchval("SELECT 1")
             return web.json_response({"status": "healthy", "service": "mayflower-sandbox"})
         except Exception:
             logger.warning("Health check failed: database unavailable", exc_info=True)
@@ -55,12 +83,19 @@ class FileServer:
                 status=503,
             )
 
-    async def serve_file(self, request: web.Request) -> web.Response:
+    async def serve_file(self, request: web.Request) -> web.StreamResponse:
         """Serve a file from VFS.
 
         URL: GET /files/{thread_id}/{file_path}
 
         Example: GET /files/user_123/tmp/data.csv
+
+        The content is written to the client in chunks. Only large files that
+        Postgres stored uncompressed are also read from the database chunk by
+        chunk; compressed ones (most text, CSV and JSON) are loaded whole
+        first, see ``VirtualFilesystem.open_file_stream``. Responses carry
+        ETag and Last-Modified; conditional requests for an unchanged file get
+        304 Not Modified without a body.
         """
         thread_id = request.match_info["thread_id"]
         file_path = "/" + request.match_info["file_path"]
@@ -68,7 +103,20 @@ class FileServer:
         vfs = VirtualFilesystem(self.db_pool, thread_id)
 
         try:
-            file_info = await vfs.read_file(file_path)
+            # Conditional requests check the metadata alone first, so a 304
+            # doesn't fetch any content
+            if request.if_none_match is not None or request.if_modified_since is not None:
+                etag, last_modified = _file_validators(await vfs.get_file_info(file_path))
+                if _is_not_modified(request, etag, last_modified):
+                    not_modified = web.Response(
+                        status=304, headers={"Cache-Control": _CACHE_CONTROL}
+                    )
+                    not_modified.etag = etag
+                    not_modified.last_modified = last_modified
+                    return not_modified
+
+            # Headers describe the same row version as the streamed content
+            file_info, chunks = await vfs.open_file_stream(file_path)
 
             # Determine if we should force download or display inline
             disposition = request.query.get("disposition", "inline")
@@ -78,8 +126,6 @@ class FileServer:
                 "Content-Disposition": f'{disposition}; filename="{file_path.split("/")[-1]}"',
             }
 
-            return web.Response(body=file_info["content"], headers=headers)
-
         except (VFSFileNotFoundError, FileNotFoundError):
             return web.json_response(
                 {"error": "File not found", "thread_id": thread_id, "file_path": file_path},
@@ -91,6 +137,19 @@ class FileServer:
             )
             return web.json_response({"error": "Internal server error"}, status=500)
 
+        etag, last_modified = _file_validators(file_info)
+        response = web.StreamResponse(headers=headers)
+        response.content_length = file_info["size"]
+        response.etag = etag
+        response.last_modified = last_modified
+        response.headers["Cache-Control"] = _CACHE_CONTROL
+        await response.prepare(request)
+        # Headers are sent; a failure now aborts the connection short of content_length
+        async for chunk in chunks:
+            await response.write(chunk)
+        await response.write_eof()
+        return response
+
     async def list_files(self, request: web.Request) -> web.Response:
         """List files for a thread.
 
@@ -106,9 +165,8 @@ class FileServer:
 
         try:
             pattern = f"{prefix}%" if prefix else None
-            files = await vfs.list_files(pattern=pattern)
+            files = await vfs.list_files_metadata(pattern=pattern)
 
-            # Convert bytes to base64 for JSON serialization (exclude content)
             file_list = [
                 {
                     "file_path": f["file_path"],
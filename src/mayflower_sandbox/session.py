@@ -5,16 +5,105 @@ Enables stateful Python execution where variables persist across
 executor restarts by storing session state in PostgreSQL.
 """
 
-import json
+import asyncio
+import hashlib
 import logging
+import zlib
+from datetime import datetime, timedelta
 
 import asyncpg
+import orjson
 
-from mayflower_sandbox.manager import SandboxManager
+from mayflower_sandbox.manager import (
+    _GET_OR_CREATE_SQL,
+    SandboxManager,
+    _check_session,
+)
 from mayflower_sandbox.sandbox_executor import ExecutionResult, SandboxExecutor
 
 logger = logging.getLogger(__name__)
 
+# Session statements run around every stateful execution. asyncpg prepares
+# statements once per connection and caches them by query text, so keeping
+# each query a single constant string guarantees those cache hits. Each one
+# is a single statement, so they run through the pool's query shortcuts.
+_SAVE_SQL = """
+    INSERT INTO sandbox_session_bytes (
+        thread_id, session_bytes, session_metadata
+    ) VALUES ($1, $2, $3)
+    ON CONFLICT (thread_id) DO UPDATE SET
+        session_bytes = EXCLUDED.session_bytes,
+        session_metadata = EXCLUDED.session_metadata,
+        updated_at = NOW()
+"""
+
+_SAVE_METADATA_SQL = """
+    UPDATE sandbox_session_bytes
+    SET session_metadata = $2, updated_at = NOW()
+    WHERE thread_id = $1
+"""
+
+_LOAD_SQL = """
+    SELECT session_bytes, session_metadata
+    FROM sandbox_session_bytes
+    WHERE thread_id = $1
+"""
+
+_OPEN_SQL = f"""
+    WITH session AS ({_GET_OR_CREATE_SQL})
+    SELECT s.*, b.session_bytes, b.session_metadata
+    FROM session s
+    LEFT JOIN sandbox_session_bytes b ON b.thread_id = $1
+"""  # noqa: S608 - only interpolates a constant
+
+_DELETE_SQL = """
+    DELETE FROM sandbox_session_bytes
+    WHERE thread_id = $1
+"""
+
+# Prefix of zlib-compressed session bytes. Pickles start with 0x80, so rows
+# written before compression was introduced are still read back unchanged.
+_COMPRESSED_MAGIC = b"MFZ\x01"
+# Session bytes below this size are stored uncompressed
+_COMPRESS_MIN_SIZE = 1024
+
+
+def _compress_session(data: bytes) -> bytes:
+    """Compress session bytes for storage if that makes them smaller."""
+    ambiguous = data.startswith(_COMPRESSED_MAGIC)
+    if len(data) < _COMPRESS_MIN_SIZE and not ambiguous:
+        return data
+    compressed = _COMPRESSED_MAGIC + zlib.compress(data, 1)
+    # Data that already looks compressed must always be wrapped
+    if len(compressed) < len(data) or ambiguous:
+        return compressed
+    return data
+
+
+def _decompress_session(data: bytes) -> bytes:
+    """Reverse _compress_session; uncompressed data is returned as-is."""
+    if data.startswith(_COMPRESSED_MAGIC):
+        return zlib.decompress(memoryview(data)[len(_COMPRESSED_MAGIC) :])
+    return data
+
+
+def _session_digest(data: bytes) -> bytes:
+    """Content hash used to detect unchanged session bytes."""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _restore_session(data: bytes) -> tuple[bytes, bytes]:
+    """Decompress stored session bytes and hash the result."""
+    session_bytes = _decompress_session(data)
+    return session_bytes, _session_digest(session_bytes)
+
+
+def _decode_metadata(metadata: str | dict | None) -> dict | None:
+    """Parse session metadata returned as a JSON string."""
+    if isinstance(metadata, str):
+        return orjson.loads(metadata)
+    return metadata
+
 
 class SessionRecovery:
     """Handles session state persistence and recovery.
@@ -23,6 +112,10 @@ class SessionRecovery:
     - Saving session_bytes to PostgreSQL after execution
     - Loading session_bytes from PostgreSQL before execution
     - Recovery after long periods of inactivity
+
+    Remembers a hash of the session bytes last loaded or saved per thread,
+    so saving unchanged bytes only updates the metadata instead of
+    rewriting the whole session.
     """
 
     def __init__(self, db_pool: asyncpg.Pool):
@@ -32,6 +125,7 @@ class SessionRecovery:
             db_pool: PostgreSQL connection pool
         """
         self.db = db_pool
+        self._last_hash: dict[str, bytes] = {}
 
     async def save_session_bytes(
         self,
@@ -49,23 +143,32 @@ class SessionRecovery:
         if session_bytes is None:
             return
 
-        async with self.db.acquire() as conn:
-            await conn.execute(
-                """
-                INSERT INTO sandbox_session_bytes (
-                    thread_id, session_bytes, session_metadata
-                ) VALUES ($1, $2, $3)
-                ON CONFLICT (thread_id) DO UPDATE SET
-                    session_bytes = EXCLUDED.session_bytes,
-                    session_metadata = EXCLUDED.session_metadata,
-                    updated_at = NOW()
-            """,
-                thread_id,
-                session_bytes,
-                json.dumps(session_metadata or {}),
-            )
+        metadata_json = orjson.dumps(session_metadata or {}).decode()
+        digest = await asyncio.to_thread(_session_digest, session_bytes)
+        if self._last_hash.get(thread_id) == digest:
+            # Execution left the session state untouched; the metadata (which
+            # the worker stamps on every run) is all that needs writing
+            await self.db.execute(_SAVE_METADATA_SQL, thread_id, metadata_json)
+            logger.debug("Session bytes unchanged for thread %s, saved metadata only", thread_id)
+            return
+
+        # zlib releases the GIL, so large sessions compress off the event loop
+        stored_bytes = await asyncio.to_thread(_compress_session, session_bytes)
+
+        await self.db.execute(
+            _SAVE_SQL,
+            thread_id,
+            stored_bytes,
+            metadata_json,
+        )
+        self._last_hash[thread_id] = digest
 
-            logger.debug(f"Saved session bytes for thread {thread_id} ({len(session_bytes)} bytes)")
+        logger.debug(
+            "Saved session bytes for thread %s (%d bytes, %d stored)",
+            thread_id,
+            len(session_bytes),
+            len(stored_bytes),
+        )
 
     async def load_session_bytes(
         self,
@@ -79,28 +182,58 @@ class SessionRecovery:
         Returns:
             Tuple of (session_bytes, session_metadata)
         """
-        async with self.db.acquire() as conn:
-            result = await conn.fetchrow(
-                """
-                SELECT session_bytes, session_metadata
-                FROM sandbox_session_bytes
-                WHERE thread_id = $1
-            """,
-                thread_id,
+        result = await self.db.fetchrow(_LOAD_SQL, thread_id)
+
+        if result:
+            session_bytes, self._last_hash[thread_id] = await asyncio.to_thread(
+                _restore_session, result["session_bytes"]
+            )
+            logger.debug(
+                "Loaded session bytes for thread %s (%d bytes)", thread_id, len(session_bytes)
             )
+            return session_bytes, _decode_metadata(result["session_metadata"])
 
-            if result:
-                logger.debug(
-                    f"Loaded session bytes for thread {thread_id} "
-                    f"({len(result['session_bytes'])} bytes)"
-                )
-                metadata = result["session_metadata"]
-                # Parse JSON string to dict if needed
-                if isinstance(metadata, str):
-                    metadata = json.loads(metadata)
-                return result["session_bytes"], metadata
+        self._last_hash.pop(thread_id, None)
+        return None, None
 
+    async def open_session(
+        self,
+        thread_id: str,
+        expiration_days: int = 180,
+    ) -> tuple[bytes | None, dict | None]:
+        """Get or create a session and load its session bytes in one round-trip.
+
+        Equivalent to SandboxManager.get_or_create_session followed by
+        load_session_bytes.
+
+        Args:
+            thread_id: Thread identifier
+            expiration_days: Lifetime of the session if it has to be created
+
+        Returns:
+            Tuple of (session_bytes, session_metadata)
+
+        Raises:
+            SessionExpiredError: If the session exists but has expired
+        """
+        expires_at = datetime.now() + timedelta(days=expiration_days)
+        result = await self.db.fetchrow(_OPEN_SQL, thread_id, expires_at, "{}")
+
+        if result is None:  # pragma: no cover - the upsert always returns a row
+            return None, None
+        session = dict(result)
+        stored_bytes = session.pop("session_bytes")
+        stored_metadata = session.pop("session_metadata")
+        _check_session(thread_id, session, expires_at)
+
+        if stored_bytes is None:
+            self._last_hash.pop(thread_id, None)
             return None, None
+        session_bytes, self._last_hash[thread_id] = await asyncio.to_thread(
+            _restore_session, stored_bytes
+        )
+        logger.debug("Loaded session bytes for thread %s (%d bytes)", thread_id, len(session_bytes))
+        return session_bytes, _decode_metadata(stored_metadata)
 
     async def delete_session_bytes(self, thread_id: str) -> bool:
         """Delete session bytes for a thread.
@@ -111,19 +244,13 @@ class SessionRecovery:
         Returns:
             True if session was deleted, False if didn't exist
         """
-        async with self.db.acquire() as conn:
-            result = await conn.execute(
-                """
-                DELETE FROM sandbox_session_bytes
-                WHERE thread_id = $1
-            """,
-                thread_id,
-            )
+        result = await self.db.execute(_DELETE_SQL, thread_id)
+        self._last_hash.pop(thread_id, None)
 
-            deleted = int(result.split()[-1])
-            if deleted > 0:
-                logger.debug(f"Deleted session bytes for thread {thread_id}")
-            return deleted > 0
+        deleted = int(result.split()[-1])
+        if deleted > 0:
+            logger.debug("Deleted session bytes for thread %s", thread_id)
+        return deleted > 0
 
 
 class StatefulExecutor:
@@ -181,15 +308,14 @@ class StatefulExecutor:
             >>> result = await executor.execute("print(x)")
             >>> assert "42" in result.stdout  # x persisted!
         """
-        # Ensure session exists
-        await self.manager.get_or_create_session(self.thread_id)
-
-        # Load previous session state from PostgreSQL
-        session_bytes, session_metadata = await self.recovery.load_session_bytes(self.thread_id)
+        # Ensure session exists and load previous session state from PostgreSQL
+        session_bytes, session_metadata = await self.recovery.open_session(
+            self.thread_id, self.manager.default_expiration_days
+        )
 
         if session_bytes:
             logger.info(
-                f"Loaded session state for thread {self.thread_id} ({len(session_bytes)} bytes)"
+                "Loaded session state for thread %s (%d bytes)", self.thread_id, len(session_bytes)
             )
 
         # Execute code with loaded state
@@ -197,7 +323,8 @@ class StatefulExecutor:
             code, session_bytes=session_bytes, session_metadata=session_metadata
         )
 
-        # Save updated session state back to PostgreSQL (only on success)
+        # Save updated session state back to PostgreSQL (only on success).
+        # open_session already updated the last accessed timestamp.
         if result.success and result.session_bytes:
             await self.recovery.save_session_bytes(
                 self.thread_id,
@@ -205,13 +332,11 @@ class StatefulExecutor:
                 result.session_metadata,
             )
             logger.info(
-                f"Saved session state for thread {self.thread_id} "
-                f"({len(result.session_bytes)} bytes)"
+                "Saved session state for thread %s (%d bytes)",
+                self.thread_id,
+                len(result.session_bytes),
             )
 
-        # Update last accessed timestamp
-        await self.manager.update_last_accessed(self.thread_id)
-
         return result
 
     async def reset_session(self) -> None:
@@ -222,6 +347,6 @@ class StatefulExecutor:
         """
         deleted = await self.recovery.delete_session_bytes(self.thread_id)
         if deleted:
-            logger.info(f"Reset session state for thread {self.thread_id}")
+            logger.info("Reset session state for thread %s", self.thread_id)
         else:
-            logger.debug(f"No session state to reset for thread {self.thread_id}")
+            logger.debug("No session state to reset for thread %s", self.thread_id)
@@ -13,6 +13,7 @@
 
 import { parseArgs } from "jsr:@std/cli@1.0.23/parse-args";
 import { fromFileUrl, join, resolve, toFileUrl } from "jsr:@std/path@1";
+import { encodeBase64 } from "./fs_utils.ts";
 
 interface ShellExecutionOptions {
   command: string;
@@ -26,7 +27,7 @@ interface ShellExecutionResult {
   stderr: string;
   exit_code: number;
   execution_time_ms: number;
-  created_files?: Array<{ path: string; content: number[] }>;
+  created_files?: Array<{ path: string; content: string }>; // base64 content
 }
 
 type BusyboxModule = {
@@ -1436,7 +1437,7 @@ export async function executeShell(
     const createdFiles = state.changedFiles.size > 0
       ? Array.from(state.changedFiles.entries()).map(([path, content]) => ({
         path,
-        content: Array.from(content),
+        content: encodeBase64(content),
       }))
       : undefined;
 
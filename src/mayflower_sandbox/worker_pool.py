@@ -6,6 +6,7 @@ Provides 70-95% performance improvement over one-shot processes.
 """
 
 import asyncio
+import base64
 import contextlib
 import json
 import logging
@@ -13,12 +14,26 @@ import os
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
+import orjson
+
 if TYPE_CHECKING:
     from asyncio.subprocess import Process
 
 logger = logging.getLogger(__name__)
 
 
+def _loads_response(line: bytes) -> Any:
+    """Parse a worker's JSON-RPC response line.
+
+    JSON.stringify emits lone surrogate escapes (e.g. "\\ud800") that orjson
+    rejects; such responses fall back to the stdlib parser, which accepts them.
+    """
+    try:
+        return orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return json.loads(line)
+
+
 class PyodideWorker:
     """Single long-running Deno worker process with JSON-RPC communication."""
 
@@ -130,7 +145,7 @@ class PyodideWorker:
                 # Log the ready message
                 for line in buffer.decode(errors="replace").splitlines():
                     if "Ready" in line:
-                        logger.debug(f"[Worker {self.worker_id}] {line.strip()}")
+                        logger.debug("[Worker %s] %s", self.worker_id, line.strip())
                 return
 
     async def execute(
@@ -170,12 +185,16 @@ class PyodideWorker:
                     "timeout_ms": timeout_ms,
                 }
 
+                # Binary payloads travel as base64 (a JSON int array is ~4x larger)
                 if session_bytes:
-                    params["session_bytes"] = list(session_bytes)
+                    params["session_bytes"] = base64.b64encode(session_bytes).decode("ascii")
                 if session_metadata:
                     params["session_metadata"] = session_metadata
                 if files:
-                    params["files"] = {path: list(content) for path, content in files.items()}
+                    params["files"] = {
+                        path: base64.b64encode(content).decode("ascii")
+                        for path, content in files.items()
+                    }
 
                 request: dict[str, Any] = {
                     "jsonrpc": "2.0",
@@ -185,11 +204,11 @@ class PyodideWorker:
                 }
 
                 # Send request
-                request_line = json.dumps(request) + "\n"
+                request_line = orjson.dumps(request) + b"\n"
                 if not self.process.stdin:
                     raise RuntimeError("Worker stdin not available")
 
-                self.process.stdin.write(request_line.encode())
+                self.process.stdin.write(request_line)
                 await self.process.stdin.drain()
 
                 # Read response (with timeout)
@@ -210,7 +229,7 @@ class PyodideWorker:
                 if not response_line:
                     raise RuntimeError("Worker closed stdout")
 
-                response = json.loads(response_line)
+                response = _loads_response(response_line)
 
                 if "error" in response:
                     raise RuntimeError(f"Worker error: {response['error']['message']}")
@@ -232,7 +251,7 @@ class PyodideWorker:
                 if not self.process.stdin or not self.process.stdout:
                     return {"status": "dead", "error": "Streams not available"}
 
-                self.process.stdin.write((json.dumps(request) + "\n").encode())
+                self.process.stdin.write(orjson.dumps(request) + b"\n")
                 await self.process.stdin.drain()
 
                 response_line = await asyncio.wait_for(self.process.stdout.readline(), timeout=5.0)
@@ -240,7 +259,7 @@ class PyodideWorker:
                 if not response_line:
                     return {"status": "dead", "error": "No response"}
 
-                response = json.loads(response_line)
+                response = _loads_response(response_line)
                 return response.get("result", {"status": "unknown"})
 
             except asyncio.TimeoutError:
@@ -259,7 +278,7 @@ class PyodideWorker:
             request = {"jsonrpc": "2.0", "id": -1, "method": "shutdown", "params": {}}
 
             if self.process.stdin:
-                self.process.stdin.write((json.dumps(request) + "\n").encode())
+                self.process.stdin.write(orjson.dumps(request) + b"\n")
                 await self.process.stdin.drain()
 
             # Wait for graceful shutdown
@@ -6,7 +6,7 @@
  */
 
 import { loadPyodide } from "npm:pyodide@0.28.3";
-import { snapshotFiles, collectFilesFromPaths } from "./fs_utils.ts";
+import { snapshotFiles, collectFilesFromPaths, decodeBase64 } from "./fs_utils.ts";
 import {
   errorToString,
   filterMicropipMessages,
@@ -32,9 +32,9 @@ interface ExecuteRequest {
   code: string;
   thread_id: string;
   stateful?: boolean;
-  session_bytes?: number[];
+  session_bytes?: string; // base64
   session_metadata?: Record<string, unknown>;
-  files?: Record<string, number[]>;
+  files?: Record<string, string>; // base64 content
   timeout_ms?: number;
 }
 
@@ -43,9 +43,9 @@ interface ExecuteResult {
   stdout: string;
   stderr: string;
   result: unknown;
-  session_bytes?: number[];
+  session_bytes?: string; // base64
   session_metadata?: Record<string, unknown>;
-  created_files?: Array<{ path: string; content: number[] }>;
+  created_files?: Array<{ path: string; content: string }>; // base64 content
   execution_time_ms: number;
 }
 
@@ -72,11 +72,11 @@ interface JsonRpcResponse {
 // are now imported from worker_utils.ts
 
 /**
- * Restore session state from bytes
+ * Restore session state from base64-encoded bytes
  */
 async function restoreSession(
   pyodide: any,
-  sessionBytes: number[],
+  sessionBytes: string,
 ): Promise<void> {
   await pyodide.runPythonAsync(`
 try:
@@ -88,16 +88,17 @@ except ImportError:
 `);
 
   await pyodide.runPythonAsync(`
-_session_bytes = bytes(${JSON.stringify(Array.from(sessionBytes))})
+import base64 as _base64
+_session_bytes = _base64.b64decode("${sessionBytes}")
 _session_obj = cloudpickle.loads(_session_bytes)
 globals().update(_session_obj)
 `);
 }
 
 /**
- * Save session state to bytes
+ * Save session state to base64-encoded bytes
  */
-async function saveSession(pyodide: any): Promise<number[]> {
+async function saveSession(pyodide: any): Promise<string> {
   const sessionBytesResult = await pyodide.runPythonAsync(`
 import types
 _globals_snapshot = dict(globals())
@@ -110,21 +111,22 @@ for k, v in _globals_snapshot.items():
     if hasattr(v, 'read') or hasattr(v, 'write'):
         continue
     _session_dict[k] = v
-list(cloudpickle.dumps(_session_dict))
+import base64 as _base64
+_base64.b64encode(cloudpickle.dumps(_session_dict)).decode("ascii")
 `);
-  return sessionBytesResult.toJs();
+  return sessionBytesResult;
 }
 
 /**
  * Mount files to Pyodide filesystem
  */
-function mountFiles(pyodide: any, files: Record<string, number[]>): void {
+function mountFiles(pyodide: any, files: Record<string, string>): void {
   for (const [path, content] of Object.entries(files)) {
     const dir = path.substring(0, path.lastIndexOf("/"));
     if (dir && dir !== "/") {
       pyodide.FS.mkdirTree(dir);
     }
-    pyodide.FS.writeFile(path, new Uint8Array(content));
+    pyodide.FS.writeFile(path, decodeBase64(content));
   }
 }
 
@@ -142,7 +144,7 @@ interface ExecutionContext {
 /**
  * Try to restore session, logging errors to stderr
  */
-async function tryRestoreSession(ctx: ExecutionContext, sessionBytes: number[]): Promise<void> {
+async function tryRestoreSession(ctx: ExecutionContext, sessionBytes: string): Promise<void> {
   try {
     ctx.pyodide.setStdout(createSuppressedStdout());
     await restoreSession(ctx.pyodide, sessionBytes);
@@ -156,7 +158,7 @@ async function tryRestoreSession(ctx: ExecutionContext, sessionBytes: number[]):
 /**
  * Mount files and invalidate import cache
  */
-async function mountAndInvalidateCache(ctx: ExecutionContext, files: Record<string, number[]>): Promise<void> {
+async function mountAndInvalidateCache(ctx: ExecutionContext, files: Record<string, string>): Promise<void> {
   mountFiles(ctx.pyodide, files);
   ctx.pyodide.setStdout(createSuppressedStdout());
   await ctx.pyodide.runPythonAsync(`import importlib; importlib.invalidate_caches()`);
@@ -182,7 +184,7 @@ async function executeCode(ctx: ExecutionContext, code: string): Promise<{ succe
 async function trySaveSession(
   ctx: ExecutionContext,
   metadata: Record<string, unknown> | undefined,
-): Promise<{ session_bytes?: number[]; session_metadata?: Record<string, unknown> }> {
+): Promise<{ session_bytes?: string; session_metadata?: Record<string, unknown> }> {
   try {
     ctx.pyodide.setStdout(createSuppressedStdout());
     await ctx.pyodide.runPythonAsync(`
@@ -214,7 +216,7 @@ function collectChangedFiles(
   pyodide: any,
   tracker: ReturnType<typeof createFileTracker>,
   beforeSnapshot: Map<string, number>,
-): Array<{ path: string; content: number[] }> | undefined {
+): Array<{ path: string; content: string }> | undefined {
   const allChangedPaths = new Set([...tracker.createdFiles, ...tracker.modifiedFiles]);
   const afterSnapshot = snapshotFiles(pyodide, ["/"]);
   const snapshotChanges = findChangedFiles(beforeSnapshot, afterSnapshot);
@@ -139,9 +139,9 @@ interface ExecuteRequest {
   code: string;
   thread_id: string;
   stateful?: boolean;
-  session_bytes?: number[];
+  session_bytes?: string; // base64
   session_metadata?: Record<string, unknown>;
-  files?: Record<string, number[]>;
+  files?: Record<string, string>; // base64 content
   timeout_ms?: number;
 }
 
@@ -161,17 +161,17 @@ Deno.test("ExecuteRequest with all fields", () => {
     code: "print(x)",
     thread_id: "thread-xyz",
     stateful: true,
-    session_bytes: [1, 2, 3, 4],
+    session_bytes: "AQIDBA==",
     session_metadata: { version: 1 },
-    files: { "/tmp/data.txt": [72, 101, 108, 108, 111] },
+    files: { "/tmp/data.txt": "SGVsbG8=" },
     timeout_ms: 30000,
   };
 
   assertEquals(request.stateful, true);
   assertExists(request.session_bytes);
-  assertEquals(request.session_bytes.length, 4);
+  assertEquals(request.session_bytes, "AQIDBA==");
   assertExists(request.files);
-  assertEquals(request.files["/tmp/data.txt"].length, 5);
+  assertEquals(request.files["/tmp/data.txt"], "SGVsbG8=");
 });
 
 // ExecuteResult interface tests
@@ -181,9 +181,9 @@ interface ExecuteResult {
   stdout: string;
   stderr: string;
   result: unknown;
-  session_bytes?: number[];
+  session_bytes?: string; // base64
   session_metadata?: Record<string, unknown>;
-  created_files?: Array<{ path: string; content: number[] }>;
+  created_files?: Array<{ path: string; content: string }>; // base64 content
   execution_time_ms: number;
 }
 
@@ -207,7 +207,7 @@ Deno.test("ExecuteResult with session data", () => {
     stdout: "",
     stderr: "",
     result: null,
-    session_bytes: [128, 0, 255],
+    session_bytes: "gAD/",
     session_metadata: { last_modified: "2024-01-01T00:00:00Z" },
     execution_time_ms: 200,
   };
@@ -224,8 +224,8 @@ Deno.test("ExecuteResult with created files", () => {
     stderr: "",
     result: null,
     created_files: [
-      { path: "/tmp/output.txt", content: [79, 75] },
-      { path: "/tmp/data.json", content: [123, 125] },
+      { path: "/tmp/output.txt", content: "T0s=" },
+      { path: "/tmp/data.json", content: "e30=" },
     ],
     execution_time_ms: 300,
   };
@@ -5,6 +5,7 @@ When deepagents is not installed, the module's own ImportError fallback
 provides proper dataclass types that support attribute access.
 """
 
+import asyncio
 import re
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -958,6 +959,55 @@ class TestSyncWrappers:
         result = backend.download_files(["/file.txt"])
         assert len(result) == 1
 
+    def test_sync_calls_reuse_thread_loop(self, backend, mock_vfs):
+        """Test sync wrappers reuse one event loop per thread instead of asyncio.run."""
+        module = get_module()
+        loops = []
+
+        async def capture_loop(path):
+            loops.append(asyncio.get_running_loop())
+            return {"content": b"content"}
+
+        mock_vfs.read_file = AsyncMock(side_effect=capture_loop)
+        with patch.object(module.asyncio, "run", side_effect=AssertionError("asyncio.run")):
+            backend.read("/a.txt")
+            backend.read("/b.txt")
+
+        assert len(loops) == 2
+        assert loops[0] is loops[1]
+        assert not loops[0].is_closed()
+
+    def test_thread_loop_cancels_leftover_tasks(self):
+        """Test tasks a sync call leaves running are cancelled, not leaked."""
+        module = get_module()
+        started = []
+
+        async def spawn():
+            started.append(asyncio.ensure_future(asyncio.sleep(3600)))
+
+        module._run_in_thread_loop(spawn())
+
+        assert started[0].cancelled()
+
+    def test_thread_loop_closed_with_its_thread(self):
+        """Test a worker thread's loop is closed once the thread is gone."""
+        import gc
+        import threading
+
+        module = get_module()
+        loops = []
+
+        async def capture_loop():
+            loops.append(asyncio.get_running_loop())
+
+        thread = threading.Thread(target=module._run_in_thread_loop, args=(capture_loop(),))
+        thread.start()
+        thread.join()
+        del thread
+        gc.collect()
+
+        assert loops[0].is_closed()
+
     def test_execute_sync(self, backend, mock_executor):
         """Test synchronous execute wrapper."""
         result = backend.execute("ls")
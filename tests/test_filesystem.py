@@ -8,6 +8,7 @@ import pytest
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
 from mayflower_sandbox.filesystem import (
+    FileChangedError,
     FileNotFoundError,
     FileTooLargeError,
     InvalidPathError,
@@ -147,6 +148,20 @@ async def test_list_files_with_pattern(filesystem, clean_files):
     assert len(all_files) == 3
 
 
+async def test_list_files_metadata(filesystem, clean_files):
+    """Test listing file metadata without contents."""
+    await filesystem.write_file("/tmp/test1.txt", b"hello")
+    await filesystem.write_file("/data/file.csv", b"a,b")
+
+    files = await filesystem.list_files_metadata()
+    assert [f["file_path"] for f in files] == ["/data/file.csv", "/tmp/test1.txt"]
+    assert all("content" not in f for f in files)
+    assert files[1]["size"] == 5
+
+    tmp_files = await filesystem.list_files_metadata("/tmp/%")
+    assert [f["file_path"] for f in tmp_files] == ["/tmp/test1.txt"]
+
+
 async def test_thread_isolation(db_pool, clean_files):
     """Test files are isolated between threads."""
     # Create filesystems for different threads
@@ -224,3 +239,128 @@ async def test_mime_type_detection(filesystem, clean_files):
     await filesystem.write_file("/docs/doc.pdf", pdf_data)
     file4 = await filesystem.read_file("/docs/doc.pdf")
     assert file4["content_type"] == "application/pdf"
+
+
+async def test_write_files_bulk(filesystem, clean_files):
+    """Test writing and overwriting many files in one call."""
+    await filesystem.write_file("/tmp/existing.txt", b"old")
+
+    written = await filesystem.write_files_bulk(
+        [
+            ("/tmp/existing.txt", b"new"),
+            ("tmp/relative.txt", b"relative"),
+            ("/images/pic.png", b"\x89PNG\r\n\x1a\n" + b"\x00" * 10),
+        ]
+    )
+    assert written == 3
+
+    existing = await filesystem.read_file("/tmp/existing.txt")
+    assert existing["content"] == b"new"
+    assert existing["size"] == 3
+
+    relative = await filesystem.read_file("/tmp/relative.txt")
+    assert relative["content"] == b"relative"
+
+    pic = await filesystem.read_file("/images/pic.png")
+    assert pic["content_type"] == "image/png"
+
+
+async def test_write_files_bulk_duplicate_paths(filesystem, clean_files):
+    """Test paths normalizing to the same file keep the last entry."""
+    written = await filesystem.write_files_bulk(
+        [("/tmp/a.txt", b"first"), ("/tmp//a.txt", b"last")]
+    )
+
+    assert written == 1
+    assert (await filesystem.read_file("/tmp/a.txt"))["content"] == b"last"
+
+
+async def test_write_files_bulk_rejects_whole_batch(filesystem, clean_files):
+    """Test an invalid entry prevents any file in the batch from being written."""
+    with pytest.raises(InvalidPathError):
+        await filesystem.write_files_bulk([("/tmp/ok.txt", b"ok"), ("../etc/passwd", b"x")])
+
+    assert await filesystem.file_exists("/tmp/ok.txt") is False
+    assert await filesystem.write_files_bulk([]) == 0
+
+
+async def test_snapshot_for_execute(filesystem, clean_files):
+    """Test snapshot returns count, total size and paths."""
+    assert await filesystem.snapshot_for_execute() == (0, 0, set())
+
+    await filesystem.write_file("/tmp/a.txt", b"12345")
+    await filesystem.write_file("/data/b.csv", b"abc")
+
+    assert await filesystem.snapshot_for_execute() == (2, 8, {"/tmp/a.txt", "/data/b.csv"})
+
+
+async def test_get_file_info(filesystem, clean_files):
+    """Test file metadata is returned without content."""
+    await filesystem.write_file("/tmp/info.txt", b"hello")
+
+    info = await filesystem.get_file_info("/tmp/info.txt")
+
+    assert "content" not in info
+    assert info["size"] == 5
+    assert info["content_type"] == "text/plain"
+    assert info["modified_at"].tzinfo is not None
+
+    with pytest.raises(FileNotFoundError):
+        await filesystem.get_file_info("/tmp/missing.txt")
+
+
+async def test_open_file_stream(filesystem, clean_files):
+    """Test metadata is returned and streamed chunks reassemble the content."""
+    content = bytes(range(256)) * 40
+    await filesystem.write_file("/tmp/stream.bin", content)
+
+    info, stream = await filesystem.open_file_stream("/tmp/stream.bin", 4096)
+    chunks = [chunk async for chunk in stream]
+
+    assert "content" not in info
+    assert info["size"] == len(content)
+    assert [len(c) for c in chunks] == [4096, 4096, 2048]
+    assert b"".join(chunks) == content
+
+
+async def test_open_file_stream_uncompressed_chunks(filesystem, clean_files):
+    """Test incompressible content is fetched chunk by chunk."""
+    content = os.urandom(10240)
+    await filesystem.write_file("/tmp/random.bin", content)
+
+    _, stream = await filesystem.open_file_stream("/tmp/random.bin", 4096)
+    chunks = [chunk async for chunk in stream]
+
+    assert [len(c) for c in chunks] == [4096, 4096, 2048]
+    assert b"".join(chunks) == content
+
+
+async def test_open_file_stream_exact_multiple_and_empty(filesystem, clean_files):
+    """Test streaming content that is a chunk multiple, and an empty file."""
+    await filesystem.write_file("/tmp/exact.bin", b"x" * 8)
+    await filesystem.write_file("/tmp/empty.txt", b"")
+
+    _, exact = await filesystem.open_file_stream("/tmp/exact.bin", 4)
+    _, empty = await filesystem.open_file_stream("/tmp/empty.txt", 4)
+
+    assert [chunk async for chunk in exact] == [b"xxxx", b"xxxx"]
+    assert [chunk async for chunk in empty] == []
+
+
+async def test_open_file_stream_overwritten_mid_read(filesystem, clean_files):
+    """Test a file overwritten between chunks raises instead of mixing versions."""
+    await filesystem.write_file("/tmp/race.bin", os.urandom(10240))
+
+    _, stream = await filesystem.open_file_stream("/tmp/race.bin", 4096)
+    first = await anext(stream)
+    await filesystem.write_file("/tmp/race.bin", os.urandom(10240))
+
+    assert len(first) == 4096
+    with pytest.raises(FileChangedError):
+        await anext(stream)
+
+
+async def test_open_file_stream_not_found(filesystem, clean_files):
+    """Test streaming a missing file raises FileNotFoundError."""
+    with pytest.raises(FileNotFoundError):
+        await filesystem.open_file_stream("/tmp/missing.txt")
@@ -65,6 +65,16 @@ async def test_get_existing_session(manager, clean_db):
     assert session1["created_at"] == session2["created_at"]
 
 
+async def test_get_existing_session_touches_last_accessed(manager, clean_db):
+    """Test re-fetching a session refreshes last_accessed in the same call."""
+    session1 = await manager.get_or_create_session("thread_touch")
+    session2 = await manager.get_or_create_session("thread_touch")
+
+    assert "created" not in session2
+    assert session2["last_accessed"] >= session1["last_accessed"]
+    assert session2["expires_at"] == session1["expires_at"]
+
+
 async def test_update_last_accessed(manager, clean_db, db_pool):
     """Test last_accessed timestamp is updated."""
     await manager.get_or_create_session("thread_789")
@@ -4,13 +4,24 @@ These tests mock Deno/pool/database to test command building, quota checks,
 MCP prelude generation, helper preloading, and error paths.
 """
 
+import asyncio
+import base64
 import json
+import os
+import threading
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from mayflower_sandbox.sandbox_executor import ExecutionResult, SandboxExecutor
+from mayflower_sandbox import sandbox_executor
+from mayflower_sandbox.filesystem import FileNotFoundError as VFSFileNotFoundError
+from mayflower_sandbox.sandbox_executor import (
+    ExecutionResult,
+    SandboxExecutor,
+    _load_helper_files,
+    _package_file,
+)
 
 # ---------------------------------------------------------------------------
 # Fixtures
@@ -53,6 +64,63 @@ def stateful_executor(mock_db_pool):
     return ex
 
 
+# ---------------------------------------------------------------------------
+# _check_deno
+# ---------------------------------------------------------------------------
+
+
+class TestCheckDeno:
+    @pytest.fixture(autouse=True)
+    def _reset_cache(self, monkeypatch):
+        monkeypatch.setattr(sandbox_executor, "_DENO_CHECKED", None)
+
+    def test_probe_runs_once_per_binary(self, executor, tmp_path):
+        deno = tmp_path / "deno"
+        deno.write_text("")
+        with (
+            patch("mayflower_sandbox.sandbox_executor.shutil.which", return_value=str(deno)),
+            patch("mayflower_sandbox.sandbox_executor.subprocess.run") as run,
+        ):
+            executor._check_deno()
+            executor._check_deno()
+            assert run.call_count == 1
+
+            # A replaced binary (new mtime) is probed again
+            os.utime(deno, ns=(0, 0))
+            executor._check_deno()
+            assert run.call_count == 2
+
+    def test_missing_deno_raises(self, executor):
+        with (
+            patch("mayflower_sandbox.sandbox_executor.shutil.which", return_value=None),
+            pytest.raises(RuntimeError, match="Deno is not installed"),
+        ):
+            executor._check_deno()
+
+
+# ---------------------------------------------------------------------------
+# Package file resolution
+# ---------------------------------------------------------------------------
+
+
+class TestPackageFiles:
+    def test_executor_paths_resolved_once(self, executor):
+        _package_file.cache_clear()
+        with patch.object(Path, "exists", return_value=True) as exists:
+            first = executor._get_executor_path()
+            second = executor._get_executor_path()
+        assert first == second
+        assert first.name == "executor.ts"
+        assert exists.call_count == 1
+
+    def test_missing_executor_raises(self, executor):
+        with (
+            patch("mayflower_sandbox.sandbox_executor._package_file", return_value=None),
+            pytest.raises(RuntimeError, match="Executor not found"),
+        ):
+            executor._get_executor_path()
+
+
 # ---------------------------------------------------------------------------
 # _build_command
 # ---------------------------------------------------------------------------
@@ -71,17 +139,10 @@ class TestBuildCommand:
         cmd = stateful_executor._build_command("x = 1")
         assert "-s" in cmd
 
-    def test_session_bytes(self, executor):
-        cmd = executor._build_command("x", session_bytes=b"\x01\x02")
-        assert "-b" in cmd
-        idx = cmd.index("-b")
-        assert json.loads(cmd[idx + 1]) == [1, 2]
-
-    def test_session_metadata(self, executor):
-        cmd = executor._build_command("x", session_metadata={"key": "val"})
-        assert "-m" in cmd
-        idx = cmd.index("-m")
-        assert json.loads(cmd[idx + 1]) == {"key": "val"}
+    def test_no_session_state_on_argv(self, stateful_executor):
+        cmd = stateful_executor._build_command("x")
+        assert "-b" not in cmd
+        assert "-m" not in cmd
 
     def test_mcp_bridge_port_in_allowed_hosts(self, executor):
         cmd = executor._build_command("x", mcp_bridge_port=9999)
@@ -130,23 +191,57 @@ class TestBuildShellCommand:
 # ---------------------------------------------------------------------------
 
 
+def _frame(executor, *args, **kwargs) -> bytes:
+    chunks = executor._prepare_stdin(*args, **kwargs)
+    assert chunks is not None
+    return b"".join(chunks)
+
+
 class TestPrepareStdin:
     def test_empty_files_returns_none(self, executor):
         assert executor._prepare_stdin({}) is None
 
     def test_mfs_protocol_header(self, executor):
-        result = executor._prepare_stdin({"/a.txt": b"hello"})
+        result = _frame(executor, {"/a.txt": b"hello"})
         assert result is not None
         assert result[:4] == b"MFS\x01"
 
     def test_mfs_metadata_contains_files(self, executor):
-        result = executor._prepare_stdin({"/a.txt": b"hello", "/b.txt": b"world"})
+        result = _frame(executor, {"/a.txt": b"hello", "/b.txt": b"world"})
         # Parse: skip 4-byte magic, read 4-byte length, then JSON
         meta_len = int.from_bytes(result[4:8], byteorder="big")
         meta = json.loads(result[8 : 8 + meta_len])
         assert len(meta["files"]) == 2
         paths = {f["path"] for f in meta["files"]}
         assert paths == {"/a.txt", "/b.txt"}
+        assert "session" not in meta
+
+    def test_session_bytes_appended_after_files(self, executor):
+        result = _frame(
+            executor,
+            {"/a.txt": b"hello"},
+            session_bytes=b"\x80\x05state",
+            session_metadata={"k": "v"},
+        )
+        meta_len = int.from_bytes(result[4:8], byteorder="big")
+        meta = json.loads(result[8 : 8 + meta_len])
+        assert meta["session"] == {"size": 7, "metadata": {"k": "v"}}
+        body = result[8 + meta_len :]
+        assert body == b"hello" + b"\x80\x05state"
+
+    def test_file_contents_not_copied(self, executor):
+        content = b"x" * 1024
+        chunks = executor._prepare_stdin({"/a.bin": content})
+        assert isinstance(chunks[-1], memoryview)
+        assert chunks[-1].obj is content
+
+    def test_session_only_payload(self, executor):
+        result = _frame(executor, {}, session_bytes=b"\x01\x02")
+        assert result is not None
+        meta_len = int.from_bytes(result[4:8], byteorder="big")
+        meta = json.loads(result[8 : 8 + meta_len])
+        assert meta["files"] == []
+        assert result[8 + meta_len :] == b"\x01\x02"
 
 
 # ---------------------------------------------------------------------------
@@ -155,30 +250,20 @@ class TestPrepareStdin:
 
 
 class TestResourceQuotas:
-    @pytest.mark.asyncio
-    async def test_within_limits(self, executor):
-        executor.vfs.list_files = AsyncMock(return_value=[{"file_path": "/a.txt", "size": 100}])
-        ok, err = await executor._check_resource_quotas()
+    def test_within_limits(self, executor):
+        ok, err = executor._check_resource_quotas(1, 100)
         assert ok is True
         assert err is None
 
-    @pytest.mark.asyncio
-    async def test_file_count_exceeded(self, executor):
+    def test_file_count_exceeded(self, executor):
         executor.max_files = 2
-        executor.vfs.list_files = AsyncMock(
-            return_value=[{"file_path": f"/{i}.txt", "size": 10} for i in range(3)]
-        )
-        ok, err = await executor._check_resource_quotas()
+        ok, err = executor._check_resource_quotas(3, 30)
         assert ok is False
         assert "File limit exceeded" in err
 
-    @pytest.mark.asyncio
-    async def test_storage_quota_exceeded(self, executor):
+    def test_storage_quota_exceeded(self, executor):
         executor.max_file_size_mb = 1
-        executor.vfs.list_files = AsyncMock(
-            return_value=[{"file_path": "/big.bin", "size": 2 * 1024 * 1024}]
-        )
-        ok, err = await executor._check_resource_quotas()
+        ok, err = executor._check_resource_quotas(1, 2 * 1024 * 1024)
         assert ok is False
         assert "Storage quota exceeded" in err
 
@@ -191,14 +276,114 @@ class TestResourceQuotas:
 class TestPreloadHelpers:
     @pytest.mark.asyncio
     async def test_loads_helpers_once(self, executor):
-        executor.vfs.write_file = AsyncMock()
+        executor.vfs.read_file = AsyncMock(side_effect=VFSFileNotFoundError("missing"))
+        executor.vfs.write_files_bulk = AsyncMock(return_value=0)
         await executor._preload_helpers()
         assert executor._helpers_loaded is True
-        first_call_count = executor.vfs.write_file.call_count
+        executor.vfs.write_files_bulk.assert_called_once()
 
         # Second call should be a no-op
         await executor._preload_helpers()
-        assert executor.vfs.write_file.call_count == first_call_count
+        executor.vfs.write_files_bulk.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_helpers_written_in_single_batch(self, executor):
+        executor.vfs.read_file = AsyncMock(side_effect=VFSFileNotFoundError("missing"))
+        executor.vfs.write_files_bulk = AsyncMock(return_value=0)
+        executor.vfs.write_file = AsyncMock()
+        await executor._preload_helpers()
+        executor.vfs.write_file.assert_not_called()
+        (files,) = executor.vfs.write_files_bulk.call_args.args
+        assert files
+        assert all(path.startswith("/home/pyodide/") for path, _ in files)
+        assert all(isinstance(content, bytes) for _, content in files)
+        assert files[-1][0] == "/home/pyodide/.helpers_version"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_first_calls_upload_once(self, executor):
+        executor.vfs.read_file = AsyncMock(side_effect=VFSFileNotFoundError("missing"))
+        executor.vfs.write_files_bulk = AsyncMock(return_value=0)
+        await asyncio.gather(*(executor._preload_helpers() for _ in range(5)))
+        executor.vfs.write_files_bulk.assert_called_once()
+        executor.vfs.read_file.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_helper_scan_runs_off_event_loop(self, executor):
+        loop_thread = threading.current_thread()
+        scan_threads = []
+
+        def fake_load(helpers_dir):
+            scan_threads.append(threading.current_thread())
+            return [], "hash"
+
+        executor.vfs.read_file = AsyncMock(side_effect=VFSFileNotFoundError("missing"))
+        executor.vfs.write_files_bulk = AsyncMock(return_value=0)
+        with patch("mayflower_sandbox.sandbox_executor._load_helper_files", fake_load):
+            await executor._preload_helpers()
+        assert scan_threads
+        assert scan_threads[0] is not loop_thread
+
+    @pytest.mark.asyncio
+    async def test_skips_upload_when_marker_matches(self, executor):
+        helpers_dir = Path(sandbox_executor.__file__).parent / "helpers"
+        _, bundle_hash = _load_helper_files(helpers_dir)
+        executor.vfs.read_file = AsyncMock(return_value={"content": bundle_hash.encode()})
+        executor.vfs.write_files_bulk = AsyncMock()
+        await executor._preload_helpers()
+        executor.vfs.write_files_bulk.assert_not_called()
+        assert executor._helpers_loaded is True
+
+    @pytest.mark.asyncio
+    async def test_uploads_when_marker_stale(self, executor):
+        executor.vfs.read_file = AsyncMock(return_value={"content": b"stale"})
+        executor.vfs.write_files_bulk = AsyncMock(return_value=0)
+        await executor._preload_helpers()
+        executor.vfs.write_files_bulk.assert_called_once()
+
+    def test_helper_bytes_cached_across_calls(self, tmp_path):
+        (tmp_path / "a.py").write_bytes(b"A = 1\n")
+        first, bundle_hash = _load_helper_files(tmp_path)
+        assert first == [("/home/pyodide/a.py", b"A = 1\n")]
+
+        with patch(
+            "mayflower_sandbox.sandbox_executor.open",
+            side_effect=AssertionError("re-read"),
+            create=True,
+        ):
+            assert _load_helper_files(tmp_path) == (first, bundle_hash)
+
+    def test_helper_files_include_subpackages(self, tmp_path):
+        (tmp_path / "a.py").write_bytes(b"A = 1\n")
+        (tmp_path / "notes.txt").write_bytes(b"skip")
+        (tmp_path / "pkg").mkdir()
+        (tmp_path / "pkg" / "__init__.py").write_bytes(b"")
+        files, _ = _load_helper_files(tmp_path)
+        assert [path for path, _ in files] == [
+            "/home/pyodide/a.py",
+            "/home/pyodide/pkg/__init__.py",
+        ]
+
+    def test_helper_cache_invalidated_on_dir_change(self, tmp_path):
+        (tmp_path / "a.py").write_bytes(b"A = 1\n")
+        _, old_hash = _load_helper_files(tmp_path)
+        (tmp_path / "b.py").write_bytes(b"B = 2\n")
+        files, new_hash = _load_helper_files(tmp_path)
+        assert {path for path, _ in files} == {"/home/pyodide/a.py", "/home/pyodide/b.py"}
+        assert new_hash != old_hash
+
+    def test_helper_cache_invalidated_on_nested_change(self, tmp_path):
+        (tmp_path / "pkg").mkdir()
+        module = tmp_path / "pkg" / "mod.py"
+        module.write_bytes(b"A = 1\n")
+        _, old_hash = _load_helper_files(tmp_path)
+        st = module.stat()
+
+        module.write_bytes(b"A = 22\n")
+        os.utime(module, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        files, new_hash = _load_helper_files(tmp_path)
+
+        assert files == [("/home/pyodide/pkg/mod.py", b"A = 22\n")]
+        assert new_hash != old_hash
 
     @pytest.mark.asyncio
     async def test_missing_helpers_dir(self, executor, monkeypatch):
@@ -271,30 +456,48 @@ class TestJsonDefault:
 class TestSaveCreatedFiles:
     @pytest.mark.asyncio
     async def test_saves_files_on_success(self, executor):
-        executor.vfs.write_file = AsyncMock()
+        executor.vfs.write_files_bulk = AsyncMock()
         result = {
             "success": True,
             "created_files": [
                 {"path": "/tmp/a.txt", "content": [72, 105]},
+                {"path": "/tmp/b.txt", "content": [33]},
             ],
         }
         paths = await executor._save_created_files(result)
-        assert paths == ["/tmp/a.txt"]
-        executor.vfs.write_file.assert_called_once()
+        assert paths == ["/tmp/a.txt", "/tmp/b.txt"]
+        executor.vfs.write_files_bulk.assert_called_once_with(
+            [("/tmp/a.txt", b"Hi"), ("/tmp/b.txt", b"!")]
+        )
+
+    @pytest.mark.asyncio
+    async def test_base64_content_decoded(self, executor):
+        executor.vfs.write_files_bulk = AsyncMock()
+        result = {
+            "success": True,
+            "created_files": [
+                {"path": "/tmp/a.bin", "content": base64.b64encode(b"\x00\xff").decode()}
+            ],
+        }
+        paths = await executor._save_created_files(result)
+        assert paths == ["/tmp/a.bin"]
+        executor.vfs.write_files_bulk.assert_called_once_with([("/tmp/a.bin", b"\x00\xff")])
 
     @pytest.mark.asyncio
     async def test_no_files_on_failure(self, executor):
-        executor.vfs.write_file = AsyncMock()
+        executor.vfs.write_files_bulk = AsyncMock()
         result = {"success": False, "created_files": [{"path": "/tmp/a.txt", "content": [72]}]}
         paths = await executor._save_created_files(result)
         assert paths == []
+        executor.vfs.write_files_bulk.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_no_created_files_key(self, executor):
-        executor.vfs.write_file = AsyncMock()
+        executor.vfs.write_files_bulk = AsyncMock()
         result = {"success": True}
         paths = await executor._save_created_files(result)
         assert paths == []
+        executor.vfs.write_files_bulk.assert_not_called()
 
 
 # ---------------------------------------------------------------------------
@@ -305,26 +508,102 @@ class TestSaveCreatedFiles:
 class TestDetectVfsFallback:
     @pytest.mark.asyncio
     async def test_skipped_when_files_already_detected(self, executor):
-        executor.vfs.list_files = AsyncMock()
+        executor.vfs.snapshot_for_execute = AsyncMock()
         result = {"success": True}
         paths = await executor._detect_vfs_fallback_files(set(), result, ["/tmp/a.txt"])
         assert paths == ["/tmp/a.txt"]
-        executor.vfs.list_files.assert_not_called()
+        executor.vfs.snapshot_for_execute.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_skipped_on_failure(self, executor):
-        executor.vfs.list_files = AsyncMock()
+        executor.vfs.snapshot_for_execute = AsyncMock()
         result = {"success": False}
         paths = await executor._detect_vfs_fallback_files(set(), result, [])
         assert paths == []
-        executor.vfs.list_files.assert_not_called()
+        executor.vfs.snapshot_for_execute.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_detects_new_files(self, executor):
-        executor.vfs.list_files = AsyncMock(return_value=[{"file_path": "/tmp/new.bin"}])
+        executor.vfs.snapshot_for_execute = AsyncMock(
+            return_value=(2, 10, {"/tmp/old.txt", "/tmp/new.bin"})
+        )
+        executor.vfs.list_files = AsyncMock(side_effect=AssertionError("reads contents"))
         result = {"success": True}
-        paths = await executor._detect_vfs_fallback_files(set(), result, [])
-        assert "/tmp/new.bin" in paths
+        paths = await executor._detect_vfs_fallback_files({"/tmp/old.txt"}, result, [])
+        assert paths == ["/tmp/new.bin"]
+
+
+# ---------------------------------------------------------------------------
+# Shell stdout streaming
+# ---------------------------------------------------------------------------
+
+
+class TestShellStreaming:
+    @pytest.mark.asyncio
+    async def test_read_last_line_skips_trailing_blank_lines(self):
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"noise\n" * 1000 + b'{"success": true}\n\n')
+        reader.feed_eof()
+        assert await SandboxExecutor._read_last_line(reader) == b'{"success": true}'
+
+    @pytest.mark.asyncio
+    async def test_read_last_line_longer_than_stream_limit(self):
+        reader = asyncio.StreamReader(limit=16)
+        long_line = b"x" * (3 * sandbox_executor._SHELL_STDOUT_CHUNK_SIZE + 5)
+        reader.feed_data(b"noise\n" + long_line)
+        reader.feed_eof()
+        assert await SandboxExecutor._read_last_line(reader) == long_line
+
+    @pytest.mark.asyncio
+    async def test_failed_read_kills_process(self, executor, monkeypatch):
+        import sys
+
+        executor.vfs.snapshot_for_execute = AsyncMock(return_value=(0, 0, set()))
+        executor.vfs.get_all_files_for_pyodide = AsyncMock(return_value={})
+        monkeypatch.setattr(
+            executor,
+            "_build_shell_command",
+            lambda command: [sys.executable, "-c", "import time; time.sleep(30)"],
+        )
+        monkeypatch.setattr(
+            SandboxExecutor, "_read_last_line", AsyncMock(side_effect=ValueError("too long"))
+        )
+        spawned = []
+        real_exec = asyncio.create_subprocess_exec
+
+        async def _spawn(*args, **kwargs):
+            proc = await real_exec(*args, **kwargs)
+            spawned.append(proc)
+            return proc
+
+        monkeypatch.setattr(asyncio, "create_subprocess_exec", _spawn)
+
+        result = await executor.execute_shell("cat big")
+
+        assert result.stderr == "Shell execution error: too long"
+        assert spawned[0].returncode is not None
+        assert all(
+            task.done() for task in asyncio.all_tasks() if task is not asyncio.current_task()
+        )
+
+    @pytest.mark.asyncio
+    async def test_read_last_line_none_stream(self):
+        assert await SandboxExecutor._read_last_line(None) == b""
+
+    @pytest.mark.asyncio
+    async def test_feed_stdin_writes_and_closes(self):
+        proc = MagicMock()
+        proc.stdin.drain = AsyncMock()
+        await SandboxExecutor._feed_stdin(proc, [b"MFS\x01", memoryview(b"data")])
+        assert [bytes(c.args[0]) for c in proc.stdin.write.call_args_list] == [b"MFS\x01", b"data"]
+        proc.stdin.close.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_feed_stdin_tolerates_broken_pipe(self):
+        proc = MagicMock()
+        proc.stdin.drain = AsyncMock(side_effect=BrokenPipeError)
+        await SandboxExecutor._feed_stdin(proc, [b"data"])
+        proc.stdin.close.assert_called_once()
 
 
 # ---------------------------------------------------------------------------
@@ -3,8 +3,12 @@
 Tests for schema_validator module - jsonschema validation for MCP calls.
 """
 
+import asyncio
+
 import pytest
+from jsonschema.validators import validator_for
 
+from mayflower_sandbox import schema_validator
 from mayflower_sandbox.schema_validator import (
     MCPSchemaValidator,
     get_validator,
@@ -12,6 +16,11 @@ from mayflower_sandbox.schema_validator import (
 )
 
 
+def _compiled(validator, server_name, tool_name):
+    """Look up the cached compiled schema for a tool."""
+    return validator._compiled[validator._schema_keys[server_name][tool_name]]
+
+
 @pytest.fixture
 def validator():
     """Create a fresh validator for each test."""
@@ -265,3 +274,419 @@ class TestComplexSchemas:
             "app", "add_users", {"users": [{"email": "no-name@example.com"}]}
         )
         assert len(errors) >= 1
+
+        # Error paths join property names and array indices
+        errors = validator.validate("app", "add_users", {"users": [{"name": "Alice"}, {"name": 1}]})
+        assert errors == ["users.1.name: 1 is not of type 'string'"]
+
+
+class TestPrecheck:
+    """Tests for the root-level required/size precheck."""
+
+    def test_missing_required_skips_full_walk(self, validator, sample_schemas, monkeypatch):
+        """Missing required keys are reported without running the full validation."""
+        validator.load_schemas("github", sample_schemas)
+        monkeypatch.setattr(
+            MCPSchemaValidator,
+            "_collect_errors",
+            staticmethod(lambda *_: pytest.fail("full validation should not run")),
+        )
+
+        errors = validator.validate("github", "create_issue", {"body": "No title"})
+
+        assert errors == ["root: 'title' is a required property"]
+
+    @pytest.mark.parametrize(
+        ("schema", "args"),
+        [
+            ({"type": "object", "required": ["a", "b"]}, {"c": 1}),
+            ({"type": "object", "minProperties": 1}, {}),
+            ({"type": "object", "minProperties": 2}, {"a": 1}),
+            ({"type": "object", "maxProperties": 1}, {"a": 1, "b": 2}),
+        ],
+    )
+    def test_messages_match_jsonschema(self, validator, schema, args):
+        """Precheck messages are identical to the full jsonschema output."""
+        validator.load_schemas("app", {"tool": schema})
+        compiled = _compiled(validator, "app", "tool")
+
+        assert validator.validate("app", "tool", args) == MCPSchemaValidator._collect_errors(
+            compiled, args
+        )
+
+    def test_passes_through_to_full_validation(self, validator, sample_schemas):
+        """Arguments that pass the precheck are still fully validated."""
+        validator.load_schemas("github", sample_schemas)
+
+        errors = validator.validate("github", "create_issue", {"title": 123})
+
+        assert errors == ["title: 123 is not of type 'string'"]
+
+    def test_root_ref_disables_precheck(self, validator):
+        """Keywords beside a root $ref are not prechecked (draft 7 ignores them)."""
+        validator.load_schemas(
+            "app",
+            {
+                "tool": {
+                    "$schema": "http://json-schema.org/draft-07/schema#",
+                    "definitions": {"obj": {"type": "object"}},
+                    "$ref": "#/definitions/obj",
+                    "required": ["a"],
+                },
+            },
+        )
+
+        assert _compiled(validator, "app", "tool").required == ()
+        assert validator.validate("app", "tool", {}) == []
+
+
+class TestLoadSchemasAsync:
+    """Tests for compiling schemas off the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_compiles_in_worker_thread(self, validator, sample_schemas, monkeypatch):
+        """Uncached schemas are compiled through asyncio.to_thread."""
+        calls = []
+        real_to_thread = asyncio.to_thread
+
+        async def spy(func, *args):
+            calls.append(func)
+            return await real_to_thread(func, *args)
+
+        monkeypatch.setattr(schema_validator.asyncio, "to_thread", spy)
+
+        await validator.load_schemas_async("github", sample_schemas)
+
+        assert calls == [schema_validator._compile_pending]
+        assert validator.list_tools("github") == ["create_issue", "list_issues"]
+        assert validator.validate("github", "create_issue", {}) != []
+
+    @pytest.mark.asyncio
+    async def test_cached_schemas_skip_thread(self, validator, sample_schemas, monkeypatch):
+        """Schemas already compiled are installed without a worker thread hop."""
+        validator.load_schemas("github", sample_schemas)
+
+        async def fail(*_args):
+            pytest.fail("no compilation expected")
+
+        monkeypatch.setattr(schema_validator.asyncio, "to_thread", fail)
+
+        await validator.load_schemas_async("gitlab", sample_schemas)
+
+        assert validator.has_schema("gitlab", "list_issues")
+
+    @pytest.mark.asyncio
+    async def test_invalid_schema_skipped(self, validator, caplog):
+        """Invalid schemas are reported and not loaded, as with load_schemas."""
+        await validator.load_schemas_async("app", {"bad": {"type": "not-a-type"}})
+
+        assert not validator.has_schema("app", "bad")
+        assert "Failed to compile schema for app.bad" in caplog.text
+
+
+class TestCompiledCache:
+    """Tests for the content-addressed compile cache."""
+
+    def test_identical_schemas_compiled_once(self, validator, sample_schemas):
+        """The same schema under different tools and servers shares one compiled entry."""
+        validator.load_schemas("github", sample_schemas)
+        validator.load_schemas("gitlab", {"open_issue": sample_schemas["create_issue"]})
+
+        assert _compiled(validator, "github", "create_issue") is _compiled(
+            validator, "gitlab", "open_issue"
+        )
+        assert len(validator._compiled) == 2
+
+    def test_key_ignores_key_order(self, validator):
+        """Schemas differing only in key order hash to the same entry."""
+        validator.load_schemas("a", {"t": {"type": "object", "required": ["x"]}})
+        validator.load_schemas("b", {"t": {"required": ["x"], "type": "object"}})
+
+        assert _compiled(validator, "a", "t") is _compiled(validator, "b", "t")
+
+    def test_key_handles_big_integers(self, validator):
+        """Schemas with integers beyond 64 bits are still registered and enforced."""
+        schema = {"type": "object", "properties": {"n": {"type": "integer", "maximum": 10**20}}}
+        validator.load_schemas("app", {"t": schema})
+
+        assert validator.has_schema("app", "t")
+        assert validator.validate("app", "t", {"n": "not an int"}) != []
+        assert validator.validate("app", "t", {"n": 10**19}) == []
+
+    def test_unload_keeps_shared_entries(self, validator, sample_schemas):
+        """Unloading one server keeps compiled schemas another server still uses."""
+        validator.load_schemas("github", sample_schemas)
+        validator.load_schemas("gitlab", {"open_issue": sample_schemas["create_issue"]})
+
+        validator.unload_server("github")
+
+        assert len(validator._compiled) == 1
+        assert validator.validate("gitlab", "open_issue", {}) != []
+
+    def test_lru_evicts_least_recently_used(self, sample_schemas):
+        """Beyond max_cached, the least recently used compiled schema is evicted."""
+        validator = MCPSchemaValidator(max_cached=1)
+        validator.load_schemas("github", sample_schemas)
+
+        assert len(validator._compiled) == 1
+        assert validator._schema_keys["github"]["list_issues"] in validator._compiled
+
+    def test_evicted_schema_recompiled_on_use(self, sample_schemas):
+        """Evicted schemas keep validating and are recompiled on their next use."""
+        validator = MCPSchemaValidator(max_cached=1)
+        validator.load_schemas("github", sample_schemas)
+
+        assert validator.has_schema("github", "create_issue")
+        assert validator.validate("github", "create_issue", {}) != []
+        assert validator._schema_keys["github"]["create_issue"] in validator._compiled
+        assert len(validator._compiled) == 1
+
+    def test_validate_refreshes_recency(self, sample_schemas):
+        """A validated schema becomes most recently used and survives the next insert."""
+        validator = MCPSchemaValidator(max_cached=2)
+        validator.load_schemas("github", sample_schemas)
+        validator.validate("github", "create_issue", {"title": "Bug"})
+
+        validator.load_schemas("app", {"ping": {"type": "object"}})
+
+        assert validator._schema_keys["github"]["create_issue"] in validator._compiled
+        assert validator._schema_keys["github"]["list_issues"] not in validator._compiled
+
+    def test_max_cached_must_be_positive(self):
+        """A cache bound below one is rejected."""
+        with pytest.raises(ValueError, match="max_cached"):
+            MCPSchemaValidator(max_cached=0)
+
+    def test_unload_releases_unreferenced_entries(self, validator, sample_schemas):
+        """Compiled schemas are dropped once no tool references them."""
+        validator.load_schemas("github", sample_schemas)
+        validator.unload_server("github")
+
+        assert len(validator._compiled) == 0
+
+
+@pytest.mark.skipif(
+    not schema_validator.FASTJSONSCHEMA_AVAILABLE, reason="fastjsonschema not installed"
+)
+class TestFastPath:
+    """Tests for the optional fastjsonschema fast path."""
+
+    def test_compiles_fast_validator(self, validator, sample_schemas):
+        """Plain draft-7-compatible schemas get a compiled fast validator."""
+        validator.load_schemas("github", sample_schemas)
+
+        assert _compiled(validator, "github", "create_issue").fast is not None
+        assert _compiled(validator, "github", "list_issues").fast is not None
+
+    def test_valid_args_skip_jsonschema(self, validator, sample_schemas, monkeypatch):
+        """Valid arguments are accepted without walking the jsonschema validator."""
+        validator.load_schemas("github", sample_schemas)
+        monkeypatch.setattr(_compiled(validator, "github", "create_issue"), "validator", None)
+
+        assert validator.validate("github", "create_issue", {"title": "Bug"}) == []
+
+    def test_invalid_args_use_jsonschema_messages(self, validator, sample_schemas):
+        """Rejected arguments are reported with jsonschema's error messages."""
+        validator.load_schemas("github", sample_schemas)
+
+        errors = validator.validate("github", "create_issue", {"title": 123})
+
+        assert errors == ["title: 123 is not of type 'string'"]
+
+    def test_fast_rejection_defers_to_jsonschema(self, validator):
+        """fastjsonschema checks formats; jsonschema (authoritative) does not."""
+        validator.load_schemas(
+            "app", {"notify": {"type": "object", "properties": {"to": {"format": "email"}}}}
+        )
+
+        assert validator.validate("app", "notify", {"to": "not-an-email"}) == []
+
+    def test_newer_keywords_skip_fast_path(self, validator):
+        """Schemas using 2020-12-only keywords are validated by jsonschema alone."""
+        validator.load_schemas(
+            "app",
+            {
+                "pair": {
+                    "type": "array",
+                    "prefixItems": [{"type": "string"}, {"type": "integer"}],
+                },
+            },
+        )
+
+        assert _compiled(validator, "app", "pair").fast is None
+        assert validator.validate("app", "pair", ["a", "b"]) != []
+
+    def test_ref_with_siblings_skips_fast_path(self, validator):
+        """$ref siblings are applied by 2020-12 but ignored by draft 7."""
+        validator.load_schemas(
+            "app",
+            {
+                "tool": {
+                    "$defs": {"name": {"type": "string"}},
+                    "type": "object",
+                    "properties": {"name": {"$ref": "#/$defs/name", "minLength": 3}},
+                },
+            },
+        )
+
+        assert _compiled(validator, "app", "tool").fast is None
+        assert validator.validate("app", "tool", {"name": "ab"}) != []
+
+    def test_explicit_draft7_uses_fast_path(self, validator):
+        """Schemas declaring draft 7 are compiled even with draft-7-only keywords."""
+        validator.load_schemas(
+            "app",
+            {
+                "tool": {
+                    "$schema": "http://json-schema.org/draft-07/schema#",
+                    "type": "object",
+                    "dependencies": {"a": ["b"]},
+                },
+            },
+        )
+
+        assert _compiled(validator, "app", "tool").fast is not None
+        assert validator.validate("app", "tool", {"a": 1, "b": 2}) == []
+        assert validator.validate("app", "tool", {"a": 1}) != []
+
+    def test_float_multiple_of_skips_fast_path(self, validator):
+        """fastjsonschema accepts 0.07 as a multiple of 0.01; jsonschema does not."""
+        validator.load_schemas(
+            "app",
+            {"pay": {"type": "object", "properties": {"amount": {"multipleOf": 0.01}}}},
+        )
+
+        assert _compiled(validator, "app", "pay").fast is None
+        assert validator.validate("app", "pay", {"amount": 0.07}) != []
+
+    @pytest.mark.parametrize(
+        ("schema", "instance"),
+        [
+            ({"multipleOf": 0.01}, 0.07),
+            ({"multipleOf": 0.1}, 0.3),
+            ({"multipleOf": 3}, 9),
+            ({"multipleOf": 3}, 10),
+            ({"multipleOf": 2}, 9007199254740993),
+            ({"multipleOf": 7}, 1e300),
+            ({"enum": [1]}, True),
+            ({"const": 0}, False),
+            ({"uniqueItems": True}, [1, True]),
+            ({"type": "integer"}, 1.0),
+            ({"type": "integer"}, True),
+            ({"minimum": 1}, True),
+            ({"pattern": "^a$"}, "a\n"),
+            ({"maxLength": 1}, "\U0001f600"),
+            ({"format": "email"}, "x"),
+            ({"exclusiveMaximum": 1}, 1),
+            ({"propertyNames": {"maxLength": 1}}, {"ab": 1}),
+            ({"if": {"type": "string"}, "then": {"maxLength": 1}}, "ab"),
+        ],
+    )
+    def test_agrees_with_jsonschema(self, validator, schema, instance):
+        """The fast path never accepts what jsonschema alone would reject."""
+        tool_schema = {"type": "object", "properties": {"value": schema}}
+        validator.load_schemas("app", {"tool": tool_schema})
+        expected = validator_for(tool_schema)(tool_schema).is_valid({"value": instance})
+
+        assert (validator.validate("app", "tool", {"value": instance}) == []) == expected
+
+    def test_unavailable_falls_back(self, validator, sample_schemas, monkeypatch):
+        """Without fastjsonschema every schema is validated by jsonschema."""
+        monkeypatch.setattr(schema_validator, "FASTJSONSCHEMA_AVAILABLE", False)
+        validator.load_schemas("github", sample_schemas)
+
+        assert _compiled(validator, "github", "create_issue").fast is None
+        assert validator.validate("github", "create_issue", {"title": "Bug"}) == []
+        assert validator.validate("github", "create_issue", {}) != []
+
+
+@pytest.mark.skipif(
+    not schema_validator.FASTJSONSCHEMA_AVAILABLE, reason="fastjsonschema not installed"
+)
+class TestPrecompileToDisk:
+    """Tests for writing fast validators to disk ahead of time."""
+
+    def test_writes_and_installs_modules(self, validator, sample_schemas, tmp_path):
+        """Each eligible schema is written once and its module installed."""
+        sample_schemas["update_issue"] = sample_schemas["create_issue"]
+        validator.load_schemas("github", sample_schemas)
+
+        written = validator.precompile_to_disk("github", tmp_path)
+
+        assert len(written) == 2
+        assert all(path.parent == tmp_path for path in written)
+        fast = _compiled(validator, "github", "create_issue").fast
+        assert fast.__module__.startswith("_mcp_schema_")
+        assert validator.validate("github", "create_issue", {"title": "Bug"}) == []
+        assert validator.validate("github", "create_issue", {"title": 1}) != []
+
+    def test_new_validator_imports_precompiled(
+        self, validator, sample_schemas, tmp_path, monkeypatch
+    ):
+        """A validator with precompiled_dir imports modules instead of compiling."""
+        validator.load_schemas("github", sample_schemas)
+        validator.precompile_to_disk("github", tmp_path)
+
+        def _no_compile(*args, **kwargs):
+            raise AssertionError("schema was compiled")
+
+        monkeypatch.setattr(schema_validator.fastjsonschema, "compile", _no_compile)
+        fresh = MCPSchemaValidator(precompiled_dir=tmp_path)
+        fresh.load_schemas("github", sample_schemas)
+
+        assert _compiled(fresh, "github", "list_issues").fast is not None
+        assert fresh.validate("github", "list_issues", {"state": "open"}) == []
+
+    async def test_async_load_imports_precompiled(self, validator, sample_schemas, tmp_path):
+        """load_schemas_async also picks up precompiled modules."""
+        validator.load_schemas("github", sample_schemas)
+        validator.precompile_to_disk("github", tmp_path)
+
+        fresh = MCPSchemaValidator(precompiled_dir=tmp_path)
+        await fresh.load_schemas_async("github", sample_schemas)
+
+        fast = _compiled(fresh, "github", "create_issue").fast
+        assert fast.__module__.startswith("_mcp_schema_")
+
+    def test_skips_ineligible_schemas(self, validator, tmp_path):
+        """Schemas fastjsonschema can't evaluate faithfully are not written."""
+        validator.load_schemas(
+            "app", {"pair": {"type": "array", "prefixItems": [{"type": "string"}]}}
+        )
+
+        assert validator.precompile_to_disk("app", tmp_path) == []
+
+    def test_requires_fastjsonschema(self, validator, sample_schemas, tmp_path, monkeypatch):
+        """Precompiling without the optional dependency is an error."""
+        validator.load_schemas("github", sample_schemas)
+        monkeypatch.setattr(schema_validator, "FASTJSONSCHEMA_AVAILABLE", False)
+
+        with pytest.raises(RuntimeError, match="fast-validation"):
+            validator.precompile_to_disk("github", tmp_path)
+
+
+class TestValidateMany:
+    """Tests for validating a batch of tool calls."""
+
+    def test_matches_validate(self, validator, sample_schemas):
+        """Each result equals what validate() returns for that call."""
+        validator.load_schemas("github", sample_schemas)
+        calls = [
+            ("github", "create_issue", {"title": "Bug"}),
+            ("github", "create_issue", {}),
+            ("github", "list_issues", {"limit": 0}),
+            ("github", "unknown_tool", {"anything": 1}),
+            ("other", "tool", {}),
+        ]
+
+        results = validator.validate_many(calls)
+
+        assert results == [validator.validate(*call) for call in calls]
+        assert results[0] == []
+        assert results[1] == ["root: 'title' is a required property"]
+        assert results[2] != []
+        assert results[3] == results[4] == []
+
+    def test_empty_batch(self, validator):
+        """An empty batch returns no results."""
+        assert validator.validate_many([]) == []
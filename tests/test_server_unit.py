@@ -1,5 +1,6 @@
 """Unit tests for server.py — covers health check failure and list_files error path."""
 
+from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -30,10 +31,7 @@ class TestHealthCheckUnhealthy:
     @pytest.fixture
     async def unhealthy_client(self):
         mock_pool = MagicMock()
-        mock_conn = AsyncMock()
-        mock_conn.fetchval = AsyncMock(side_effect=Exception("connection refused"))
-        mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
-        mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=False)
+        mock_pool.fetchval = AsyncMock(side_effect=Exception("connection refused"))
 
         server = FileServer(mock_pool, host="127.0.0.1", port=0)
         async with TestClient(TestServer(server.app)) as client:
@@ -61,7 +59,7 @@ class TestServeFileError:
 
         with patch("mayflower_sandbox.server.VirtualFilesystem") as mock_vfs_cls:
             mock_vfs = AsyncMock()
-            mock_vfs.read_file = AsyncMock(side_effect=RuntimeError("disk error"))
+            mock_vfs.open_file_stream = AsyncMock(side_effect=RuntimeError("disk error"))
             mock_vfs_cls.return_value = mock_vfs
 
             async with TestClient(TestServer(server.app)) as client:
@@ -75,6 +73,94 @@ class TestServeFileError:
         assert data["error"] == "Internal server error"
 
 
+# ---------------------------------------------------------------------------
+# serve_file streaming
+# ---------------------------------------------------------------------------
+
+
+class TestServeFileStreaming:
+    @pytest.fixture
+    async def streaming_client(self):
+        mock_pool = MagicMock()
+        server = FileServer(mock_pool, host="127.0.0.1", port=0)
+
+        async def chunks():
+            for chunk in (b"hello ", b"streamed ", b"world"):
+                yield chunk
+
+        file_info = {
+            "content_type": "text/plain",
+            "size": 20,
+            "modified_at": datetime(
+                2025, 1, 2, 4, 4, 5, 678901, tzinfo=timezone(timedelta(hours=1))
+            ),
+        }
+
+        with patch("mayflower_sandbox.server.VirtualFilesystem") as mock_vfs_cls:
+            mock_vfs = MagicMock()
+            mock_vfs.get_file_info = AsyncMock(return_value=file_info)
+            mock_vfs.read_file = AsyncMock(side_effect=AssertionError("read whole file"))
+            mock_vfs.open_file_stream = AsyncMock(side_effect=lambda _path: (file_info, chunks()))
+            mock_vfs_cls.return_value = mock_vfs
+
+            async with TestClient(TestServer(server.app)) as client:
+                yield client
+
+    @pytest.mark.asyncio
+    async def test_streams_chunks(self, streaming_client):
+        resp = await streaming_client.get("/files/thread1/tmp/test.txt")
+        assert resp.status == 200
+        assert resp.headers["Content-Type"] == "text/plain"
+        assert resp.headers["Content-Length"] == "20"
+        assert await resp.read() == b"hello streamed world"
+
+    @pytest.mark.asyncio
+    async def test_sets_cache_validators(self, streaming_client):
+        resp = await streaming_client.get("/files/thread1/tmp/test.txt")
+        assert resp.headers["ETag"] == f'"14-{1735787045678901:x}"'
+        assert resp.headers["Last-Modified"] == "Thu, 02 Jan 2025 03:04:05 GMT"
+        assert resp.headers["Cache-Control"] == "no-cache"
+
+    @pytest.mark.asyncio
+    async def test_if_none_match_returns_304(self, streaming_client):
+        etag = (await streaming_client.get("/files/thread1/tmp/test.txt")).headers["ETag"]
+
+        resp = await streaming_client.get(
+            "/files/thread1/tmp/test.txt", headers={"If-None-Match": etag}
+        )
+
+        assert resp.status == 304
+        assert resp.headers["ETag"] == etag
+        assert await resp.read() == b""
+
+    @pytest.mark.asyncio
+    async def test_stale_etag_returns_body(self, streaming_client):
+        resp = await streaming_client.get(
+            "/files/thread1/tmp/test.txt",
+            headers={
+                "If-None-Match": '"stale"',
+                "If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT",
+            },
+        )
+
+        assert resp.status == 200
+        assert await resp.read() == b"hello streamed world"
+
+    @pytest.mark.asyncio
+    async def test_if_modified_since(self, streaming_client):
+        fresh = await streaming_client.get(
+            "/files/thread1/tmp/test.txt",
+            headers={"If-Modified-Since": "Thu, 02 Jan 2025 03:04:05 GMT"},
+        )
+        stale = await streaming_client.get(
+            "/files/thread1/tmp/test.txt",
+            headers={"If-Modified-Since": "Thu, 02 Jan 2025 03:04:04 GMT"},
+        )
+
+        assert fresh.status == 304
+        assert stale.status == 200
+
+
 # ---------------------------------------------------------------------------
 # list_files error path
 # ---------------------------------------------------------------------------
@@ -88,7 +174,7 @@ class TestListFilesError:
 
         with patch("mayflower_sandbox.server.VirtualFilesystem") as mock_vfs_cls:
             mock_vfs = AsyncMock()
-            mock_vfs.list_files = AsyncMock(side_effect=RuntimeError("query failed"))
+            mock_vfs.list_files_metadata = AsyncMock(side_effect=RuntimeError("query failed"))
             mock_vfs_cls.return_value = mock_vfs
 
             async with TestClient(TestServer(server.app)) as client:
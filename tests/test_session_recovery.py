@@ -4,12 +4,16 @@ Tests for session recovery and stateful execution.
 
 import os
 import sys
+from unittest.mock import AsyncMock, patch
 
 import asyncpg
 import pytest
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
+from mayflower_sandbox import session
+from mayflower_sandbox.manager import SessionExpiredError
+from mayflower_sandbox.sandbox_executor import ExecutionResult
 from mayflower_sandbox.session import SessionRecovery, StatefulExecutor
 
 
@@ -335,6 +339,195 @@ async def test_session_metadata_updates(recovery, db_pool, clean_db):
     assert metadata["modified"] == "2025-01-02"
 
 
+async def test_large_session_bytes_stored_compressed(recovery, db_pool, clean_db):
+    """Test large session bytes are compressed in storage and restored intact."""
+    async with db_pool.acquire() as conn:
+        await conn.execute(
+            """
+            INSERT INTO sandbox_sessions (thread_id, expires_at)
+            VALUES ('test_compress', NOW() + INTERVAL '1 day')
+        """
+        )
+
+    session_bytes = b"\x80\x05" + b"repetitive pickled state " * 4000
+    await recovery.save_session_bytes("test_compress", session_bytes, {})
+
+    async with db_pool.acquire() as conn:
+        stored = await conn.fetchval(
+            "SELECT session_bytes FROM sandbox_session_bytes WHERE thread_id = 'test_compress'"
+        )
+    assert stored.startswith(b"MFZ\x01")
+    assert len(stored) < len(session_bytes)
+
+    loaded_bytes, _ = await recovery.load_session_bytes("test_compress")
+    assert loaded_bytes == session_bytes
+
+
+async def test_load_uncompressed_legacy_session_bytes(recovery, db_pool, clean_db):
+    """Test rows written before compression are loaded unchanged."""
+    legacy = b"\x80\x05" + b"legacy state " * 200
+    async with db_pool.acquire() as conn:
+        await conn.execute(
+            """
+            INSERT INTO sandbox_sessions (thread_id, expires_at)
+            VALUES ('test_legacy', NOW() + INTERVAL '1 day')
+        """
+        )
+        await conn.execute(
+            """
+            INSERT INTO sandbox_session_bytes (thread_id, session_bytes, session_metadata)
+            VALUES ('test_legacy', $1, '{}')
+        """,
+            legacy,
+        )
+
+    loaded_bytes, _ = await recovery.load_session_bytes("test_legacy")
+    assert loaded_bytes == legacy
+
+
+async def test_session_bytes_resembling_compressed_prefix(recovery, db_pool, clean_db):
+    """Test small bytes that start with the compression prefix round-trip."""
+    async with db_pool.acquire() as conn:
+        await conn.execute(
+            """
+            INSERT INTO sandbox_sessions (thread_id, expires_at)
+            VALUES ('test_prefix', NOW() + INTERVAL '1 day')
+        """
+        )
+
+    await recovery.save_session_bytes("test_prefix", b"MFZ\x01not compressed", {})
+
+    loaded_bytes, _ = await recovery.load_session_bytes("test_prefix")
+    assert loaded_bytes == b"MFZ\x01not compressed"
+
+
+async def test_open_session_creates_missing_session(recovery, db_pool, clean_db):
+    """Test open_session creates the session row when it doesn't exist."""
+    session_bytes, session_metadata = await recovery.open_session("test_open_new", 7)
+
+    assert session_bytes is None
+    assert session_metadata is None
+    async with db_pool.acquire() as conn:
+        days = await conn.fetchval(
+            """
+            SELECT EXTRACT(DAY FROM expires_at - created_at)
+            FROM sandbox_sessions WHERE thread_id = 'test_open_new'
+        """
+        )
+    assert days in (6, 7)
+
+
+async def test_open_session_loads_bytes_and_touches(recovery, db_pool, clean_db):
+    """Test open_session returns stored bytes and updates last_accessed."""
+    async with db_pool.acquire() as conn:
+        await conn.execute(
+            """
+            INSERT INTO sandbox_sessions (thread_id, expires_at, last_accessed)
+            VALUES ('test_open', NOW() + INTERVAL '1 day', NOW() - INTERVAL '1 hour')
+        """
+        )
+    await recovery.save_session_bytes("test_open", b"state", {"version": 3})
+
+    session_bytes, session_metadata = await recovery.open_session("test_open")
+
+    assert session_bytes == b"state"
+    assert session_metadata == {"version": 3}
+    async with db_pool.acquire() as conn:
+        stale = await conn.fetchval(
+            """
+            SELECT last_accessed < NOW() - INTERVAL '1 minute'
+            FROM sandbox_sessions WHERE thread_id = 'test_open'
+        """
+        )
+    assert stale is False
+
+
+async def test_open_session_expired(recovery, db_pool, clean_db):
+    """Test open_session raises for an expired session."""
+    async with db_pool.acquire() as conn:
+        await conn.execute(
+            """
+            INSERT INTO sandbox_sessions (thread_id, expires_at)
+            VALUES ('test_open_expired', NOW() - INTERVAL '1 day')
+        """
+        )
+
+    with pytest.raises(SessionExpiredError):
+        await recovery.open_session("test_open_expired")
+
+
+async def test_unchanged_session_bytes_skip_write(recovery, db_pool, clean_db):
+    """Test saving bytes identical to the last loaded state only writes the metadata."""
+    async with db_pool.acquire() as conn:
+        await conn.execute(
+            """
+            INSERT INTO sandbox_sessions (thread_id, expires_at)
+            VALUES ('test_unchanged', NOW() + INTERVAL '1 day')
+        """
+        )
+    await recovery.save_session_bytes("test_unchanged", b"state", {"version": 1})
+
+    # A fresh instance learns the current state from the load
+    fresh = SessionRecovery(db_pool)
+    await fresh.load_session_bytes("test_unchanged")
+    with patch.object(session, "_compress_session", wraps=session._compress_session) as compress:
+        await fresh.save_session_bytes("test_unchanged", b"state", {"version": 2})
+    compress.assert_not_called()
+
+    loaded_bytes, metadata = await fresh.load_session_bytes("test_unchanged")
+    assert loaded_bytes == b"state"
+    assert metadata == {"version": 2}
+
+    await fresh.save_session_bytes("test_unchanged", b"new state", {"version": 3})
+    loaded_bytes, metadata = await fresh.load_session_bytes("test_unchanged")
+    assert loaded_bytes == b"new state"
+    assert metadata == {"version": 3}
+
+
+async def test_stateful_executor_skips_unchanged_bytes(db_pool, clean_db):
+    """Test executions that leave the session untouched don't rewrite the bytes."""
+    executor = StatefulExecutor(db_pool, "thread_unchanged_exec")
+
+    def worker_result(stamp):
+        # The worker stamps last_modified into the metadata on every run
+        return ExecutionResult(
+            success=True,
+            stdout="",
+            stderr="",
+            session_bytes=b"pickled globals",
+            session_metadata={"last_modified": stamp},
+        )
+
+    executor.executor.execute = AsyncMock(return_value=worker_result("2025-01-01T00:00:00Z"))
+    await executor.execute("x = 1")
+
+    executor.executor.execute = AsyncMock(return_value=worker_result("2025-01-01T00:00:05Z"))
+    with patch.object(session, "_compress_session", wraps=session._compress_session) as compress:
+        await executor.execute("print(x)")
+    compress.assert_not_called()
+
+    _, metadata = await executor.recovery.load_session_bytes("thread_unchanged_exec")
+    assert metadata == {"last_modified": "2025-01-01T00:00:05Z"}
+
+
+async def test_save_after_delete_writes(recovery, db_pool, clean_db):
+    """Test deleting session bytes forgets the remembered state."""
+    async with db_pool.acquire() as conn:
+        await conn.execute(
+            """
+            INSERT INTO sandbox_sessions (thread_id, expires_at)
+            VALUES ('test_redelete', NOW() + INTERVAL '1 day')
+        """
+        )
+    await recovery.save_session_bytes("test_redelete", b"state", {})
+    await recovery.delete_session_bytes("test_redelete")
+
+    await recovery.save_session_bytes("test_redelete", b"state", {})
+
+    loaded_bytes, _ = await recovery.load_session_bytes("test_redelete")
+    assert loaded_bytes == b"state"
+
+
 async def test_multiple_sequential_executions(db_pool, clean_db):
     """Test multiple executions in sequence maintain state."""
     executor = StatefulExecutor(db_pool, "thread_seq", allow_net=False)
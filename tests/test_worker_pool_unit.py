@@ -133,6 +133,55 @@ class TestWorkerExecute:
         assert w.request_count == 1
         assert w.busy is False
 
+    @pytest.mark.asyncio
+    async def test_binary_params_sent_as_base64(self):
+        w = PyodideWorker(0, Path("/fake"))
+        w._loop = asyncio.get_running_loop()
+        mock_proc = MagicMock()
+        mock_proc.returncode = None
+        mock_proc.stdin = MagicMock()
+        mock_proc.stdin.write = MagicMock()
+        mock_proc.stdin.drain = AsyncMock()
+        mock_proc.stdout = MagicMock()
+        w.process = mock_proc
+
+        response = {"jsonrpc": "2.0", "id": 1, "result": {"success": True}}
+
+        with patch.object(w, "_read_large_line", new_callable=AsyncMock) as mock_read:
+            mock_read.return_value = json.dumps(response).encode() + b"\n"
+            await w.execute(
+                "x",
+                "t1",
+                stateful=True,
+                session_bytes=b"\x80\x04state",
+                files={"/tmp/a.bin": b"\x00\xff"},
+            )
+
+        params = json.loads(mock_proc.stdin.write.call_args[0][0])["params"]
+        assert params["session_bytes"] == "gARzdGF0ZQ=="
+        assert params["files"] == {"/tmp/a.bin": "AP8="}
+
+    @pytest.mark.asyncio
+    async def test_lone_surrogate_in_result(self):
+        w = PyodideWorker(0, Path("/fake"))
+        w._loop = asyncio.get_running_loop()
+        mock_proc = MagicMock()
+        mock_proc.returncode = None
+        mock_proc.stdin = MagicMock()
+        mock_proc.stdin.write = MagicMock()
+        mock_proc.stdin.drain = AsyncMock()
+        mock_proc.stdout = MagicMock()
+        w.process = mock_proc
+
+        # What JSON.stringify produces for a string holding an unpaired surrogate
+        response_line = b'{"jsonrpc": "2.0", "id": 1, "result": {"result": "\\ud800"}}\n'
+
+        with patch.object(w, "_read_large_line", new_callable=AsyncMock) as mock_read:
+            mock_read.return_value = response_line
+            result = await w.execute("x", "t1")
+
+        assert result == {"result": "\ud800"}
+
     @pytest.mark.asyncio
     async def test_worker_error_response(self):
         w = PyodideWorker(0, Path("/fake"))